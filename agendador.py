@@ -0,0 +1,86 @@
+import os
+import concurrent.futures
+from typing import NamedTuple
+
+TAMANHO_MINIMO_TAREFA = 8 * 1024 * 1024
+
+class TarefaArquivo(NamedTuple):
+    """Trecho de um CSV a processar: bytes [inicio, fim) do arquivo, ou o arquivo inteiro se inicio for None."""
+    caminho: str
+    inicio: int | None
+    fim: int | None
+    tamanho: int
+
+def _fim_do_cabecalho(caminho_arquivo: str) -> int:
+    with open(caminho_arquivo, 'rb') as arquivo:
+        arquivo.readline()
+        return arquivo.tell()
+
+def _dividir_arquivo(caminho_arquivo: str, tamanho_arquivo: int, tamanho_max_tarefa: int) -> list[TarefaArquivo]:
+    """
+    Divide um CSV em intervalos de bytes de até ~tamanho_max_tarefa, sempre começando no início de uma linha.
+    Considera que os campos não têm quebras de linha dentro de aspas (como nos CSVs dos tribunais).
+    """
+    inicio = _fim_do_cabecalho(caminho_arquivo)
+    tarefas = []
+    with open(caminho_arquivo, 'rb') as arquivo:
+        while inicio < tamanho_arquivo:
+            corte = inicio + tamanho_max_tarefa
+            if corte >= tamanho_arquivo:
+                fim = tamanho_arquivo
+            else:
+                arquivo.seek(corte)
+                arquivo.readline()
+                fim = arquivo.tell()
+            tarefas.append(TarefaArquivo(caminho_arquivo, inicio, fim, fim - inicio))
+            inicio = fim
+    return tarefas
+
+def planejar_tarefas(lista_arquivos: list[str], max_workers: int,
+                     tamanho_max_tarefa: int | None = None) -> list[TarefaArquivo]:
+    """
+    Monta a lista de tarefas ordenada da maior para a menor. Arquivos maiores que tamanho_max_tarefa
+    são divididos em intervalos de linhas; por padrão o limite é 1/4 da fatia de cada worker
+    (total / max_workers / 4, no mínimo TAMANHO_MINIMO_TAREFA), para que arquivos grandes não fiquem sozinhos no fim.
+    """
+    tamanhos = {caminho: os.path.getsize(caminho) for caminho in lista_arquivos}
+    if tamanho_max_tarefa is None:
+        tamanho_max_tarefa = max(sum(tamanhos.values()) // (max(max_workers, 1) * 4), TAMANHO_MINIMO_TAREFA)
+
+    tarefas = []
+    for caminho, tamanho in tamanhos.items():
+        if tamanho > tamanho_max_tarefa:
+            tarefas.extend(_dividir_arquivo(caminho, tamanho, tamanho_max_tarefa))
+        else:
+            tarefas.append(TarefaArquivo(caminho, None, None, tamanho))
+    return sorted(tarefas, key=lambda tarefa: tarefa.tamanho, reverse=True)
+
+def executar_com_orcamento(executor: concurrent.futures.Executor, funcao, tarefas: list[TarefaArquivo],
+                           max_workers: int, orcamento_bytes: int | None = None, *args):
+    """
+    Submete as tarefas (já ordenadas) ao executor mantendo no máximo max_workers em execução e,
+    com orcamento_bytes, a soma dos tamanhos em execução abaixo do orçamento. Quando a próxima tarefa
+    não cabe, a maior tarefa pendente que cabe é submetida; uma tarefa sozinha sempre pode rodar.
+    Gera (tarefa, future) conforme as tarefas terminam.
+    """
+    pendentes = list(tarefas)
+    em_execucao = {}
+    bytes_em_execucao = 0
+
+    while pendentes or em_execucao:
+        indice = 0
+        while indice < len(pendentes) and len(em_execucao) < max_workers:
+            tarefa = pendentes[indice]
+            cabe_no_orcamento = orcamento_bytes is None or bytes_em_execucao + tarefa.tamanho <= orcamento_bytes
+            if cabe_no_orcamento or not em_execucao:
+                pendentes.pop(indice)
+                em_execucao[executor.submit(funcao, tarefa, *args)] = tarefa
+                bytes_em_execucao += tarefa.tamanho
+            else:
+                indice += 1
+
+        concluidas, _ = concurrent.futures.wait(em_execucao, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in concluidas:
+            tarefa = em_execucao.pop(future)
+            bytes_em_execucao -= tarefa.tamanho
+            yield tarefa, future
@@ -0,0 +1,208 @@
+import pandas as pd
+import numpy as np
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+import cache_colunar
+import pipeline
+import Versao_NP
+import Versao_P
+
+from meta_calculadora import COLUNAS_NUMERICAS
+
+UFS = ['AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+       'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO']
+
+TRIBUNAIS_POR_RAMO = {
+    'Justiça Estadual': [f'TJ{uf}' for uf in UFS],
+    'Justiça do Trabalho': [f'TRT{numero}' for numero in range(1, 25)],
+    'Justiça Federal': [f'TRF{numero}' for numero in range(1, 7)],
+    'Justiça Eleitoral': [f'TRE-{uf}' for uf in UFS],
+    'Justiça Militar da União': [f'CJM{numero}' for numero in range(1, 13)],
+    'Justiça Militar Estadual': ['TJMSP', 'TJMMG', 'TJMRS'],
+    'Tribunais Superiores': ['STJ', 'TST', 'STM']
+}
+
+# Proporção aproximada de arquivos por ramo nos dados reais (a Justiça Estadual domina o volume).
+PESOS_RAMOS = {
+    'Justiça Estadual': 0.40,
+    'Justiça do Trabalho': 0.20,
+    'Justiça Federal': 0.10,
+    'Justiça Eleitoral': 0.15,
+    'Justiça Militar da União': 0.04,
+    'Justiça Militar Estadual': 0.03,
+    'Tribunais Superiores': 0.08
+}
+
+def gerar_dados_sinteticos(diretorio: str, n_arquivos: int = 8, linhas_por_arquivo: int = 10_000,
+                           tribunais_por_arquivo: int = 1, proporcao_vazios: float = 0.05,
+                           semente: int = 0) -> list[str]:
+    """
+    Escreve n_arquivos CSVs sintéticos em 'diretorio' com todas as colunas lidas por meta_calculadora,
+    além de colunas descritivas como as dos arquivos reais. Cada arquivo pertence a um ramo
+    (sorteado por PESOS_RAMOS) e contém até tribunais_por_arquivo tribunais desse ramo.
+    Retorna a lista de caminhos gerados.
+    """
+    rng = np.random.default_rng(semente)
+    os.makedirs(diretorio, exist_ok=True)
+    ramos = list(PESOS_RAMOS)
+    pesos = np.array(list(PESOS_RAMOS.values()))
+    caminhos = []
+
+    for numero_arquivo in range(n_arquivos):
+        ramo = ramos[rng.choice(len(ramos), p=pesos / pesos.sum())]
+        siglas_ramo = TRIBUNAIS_POR_RAMO[ramo]
+        siglas = rng.choice(siglas_ramo, size=min(tribunais_por_arquivo, len(siglas_ramo)), replace=False)
+        if ramo == 'Tribunais Superiores':
+            siglas = siglas_ramo
+
+        dados = {
+            'sigla_grau': rng.choice(['G1', 'G2', 'JE', 'TR', 'SUP'], linhas_por_arquivo),
+            'procedimento': rng.choice(['Conhecimento', 'Execução', 'Execução Fiscal', 'Recurso'], linhas_por_arquivo),
+            'ramo_justica': np.full(linhas_por_arquivo, ramo, dtype=object),
+            'sigla_tribunal': rng.choice(siglas, linhas_por_arquivo),
+            'id_ultimo_oj': rng.integers(1, 50_000, linhas_por_arquivo),
+            'dt_referencia': '2025-06-30'
+        }
+        for coluna in COLUNAS_NUMERICAS:
+            valores = pd.array(rng.poisson(rng.uniform(1, 40), linhas_por_arquivo), dtype='Int32')
+            valores[rng.random(linhas_por_arquivo) < proporcao_vazios] = pd.NA
+            dados[coluna] = valores
+
+        caminho = os.path.join(diretorio, f'sintetico_{numero_arquivo:04d}.csv')
+        pd.DataFrame(dados).to_csv(caminho, index=False)
+        caminhos.append(caminho)
+    return caminhos
+
+def _cronometrar(funcao, repeticoes: int) -> tuple[float, object]:
+    """Executa 'funcao' 'repeticoes' vezes (sem a saída no terminal) e retorna o menor tempo e o último resultado."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            resultado = funcao()
+            tempos.append(time.perf_counter() - t0)
+    return min(tempos), resultado
+
+def executar_benchmark(tamanhos: list[int], lista_workers: list[int], backends: list[str],
+                       n_arquivos: int = 8, tribunais_por_arquivo: int = 1, repeticoes: int = 3,
+                       usar_cache_colunar: bool = False, diretorio_base: str | None = None) -> list[dict]:
+    """
+    Para cada tamanho (linhas por arquivo) gera os dados sintéticos e cronometra a versão serial
+    (Versao_NP.gerar_dados_np) e a paralela (Versao_P.gerar_metas_paralelizado) em cada backend e número de workers.
+    Retorna uma linha por medição com tempo, speedup, eficiência e se as metas são idênticas às da versão serial.
+    """
+    habilitado_anterior = cache_colunar.HABILITADO
+    cache_colunar.HABILITADO = usar_cache_colunar
+    diretorio_original = pipeline.DIRETORIO_DADOS
+    resultados = []
+
+    try:
+        with tempfile.TemporaryDirectory(dir=diretorio_base) as diretorio_temporario:
+            for linhas_por_arquivo in tamanhos:
+                diretorio_dados = os.path.join(diretorio_temporario, f'dados_{linhas_por_arquivo}')
+                gerar_dados_sinteticos(diretorio_dados, n_arquivos, linhas_por_arquivo, tribunais_por_arquivo)
+                pipeline.DIRETORIO_DADOS = diretorio_dados
+                bytes_dados = sum(os.path.getsize(os.path.join(diretorio_dados, nome)) for nome in os.listdir(diretorio_dados))
+
+                tempo_serial, (_, resumo_serial) = _cronometrar(Versao_NP.gerar_dados_np, repeticoes)
+                medicao_base = {'arquivos': n_arquivos, 'linhas_por_arquivo': linhas_por_arquivo,
+                                'linhas_total': n_arquivos * linhas_por_arquivo, 'bytes': bytes_dados}
+                resultados.append({**medicao_base, 'versao': 'Versao_NP', 'backend': 'serial', 'workers': 1,
+                                   'tempo_s': tempo_serial, 'speedup': 1.0, 'eficiencia': 1.0, 'metas_identicas': True})
+                print(f"[{linhas_por_arquivo} linhas/arquivo] Versao_NP: {tempo_serial:.5f} segundos")
+
+                for backend in backends:
+                    for workers in ([1] if backend == 'serial' else lista_workers):
+                        tempo, (_, resumo) = _cronometrar(
+                            lambda: Versao_P.gerar_metas_paralelizado(backend=backend, max_workers=workers), repeticoes)
+                        speedup = tempo_serial / tempo
+                        resultados.append({**medicao_base, 'versao': 'Versao_P', 'backend': backend, 'workers': workers,
+                                           'tempo_s': tempo, 'speedup': speedup, 'eficiencia': speedup / workers,
+                                           'metas_identicas': bool(resumo.equals(resumo_serial))})
+                        print(f"[{linhas_por_arquivo} linhas/arquivo] Versao_P {backend} x{workers}: "
+                              f"{tempo:.5f} segundos (speedup {speedup:.2f})")
+    finally:
+        cache_colunar.HABILITADO = habilitado_anterior
+        pipeline.DIRETORIO_DADOS = diretorio_original
+
+    return resultados
+
+def salvar_relatorio(resultados: list[dict], prefixo_saida: str):
+    """Salva as medições em <prefixo>.json e <prefixo>.csv."""
+    with open(prefixo_saida + '.json', 'w', encoding='utf-8') as arquivo:
+        json.dump({'cpu_count': os.cpu_count(), 'resultados': resultados}, arquivo, ensure_ascii=False, indent=1)
+    pd.DataFrame(resultados).to_csv(prefixo_saida + '.csv', index=False)
+    print(f"Relatório salvo em {prefixo_saida}.json e {prefixo_saida}.csv")
+
+def comparar_com_referencia(resultados: list[dict], caminho_referencia: str, tolerancia: float = 0.2) -> list[str]:
+    """
+    Compara as medições com um relatório JSON anterior e retorna a descrição das regressões:
+    medições mais lentas que a referência além da tolerância, ou metas divergentes da versão serial.
+    """
+    with open(caminho_referencia, encoding='utf-8') as arquivo:
+        referencia = json.load(arquivo)['resultados']
+
+    chave = lambda medicao: (medicao['linhas_por_arquivo'], medicao['versao'], medicao['backend'], medicao['workers'])
+    tempos_referencia = {chave(medicao): medicao['tempo_s'] for medicao in referencia}
+
+    regressoes = []
+    for medicao in resultados:
+        if not medicao['metas_identicas']:
+            regressoes.append(f"{chave(medicao)}: metas diferentes da versão serial")
+        tempo_referencia = tempos_referencia.get(chave(medicao))
+        if tempo_referencia and medicao['tempo_s'] > tempo_referencia * (1 + tolerancia):
+            regressoes.append(f"{chave(medicao)}: {medicao['tempo_s']:.5f}s contra {tempo_referencia:.5f}s na referência")
+    return regressoes
+
+def main(argv: list[str] | None = None):
+    """Linha de comando do benchmark (subcomandos gerar e executar)."""
+    parser = argparse.ArgumentParser(description="Benchmark das versões serial e paralela com dados sintéticos.")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_gerar = subparsers.add_parser('gerar', help="Gera CSVs sintéticos de tribunais.")
+    parser_gerar.add_argument('diretorio')
+    parser_gerar.add_argument('--arquivos', type=int, default=8)
+    parser_gerar.add_argument('--linhas', type=int, default=10_000, help="Linhas por arquivo.")
+    parser_gerar.add_argument('--tribunais', type=int, default=1, help="Tribunais por arquivo.")
+    parser_gerar.add_argument('--semente', type=int, default=0)
+
+    parser_executar = subparsers.add_parser('executar', help="Cronometra as versões e gera o relatório de speedup.")
+    parser_executar.add_argument('--arquivos', type=int, default=8)
+    parser_executar.add_argument('--linhas', type=int, nargs='+', default=[10_000, 50_000], help="Linhas por arquivo (um ou mais tamanhos).")
+    parser_executar.add_argument('--tribunais', type=int, default=1, help="Tribunais por arquivo.")
+    parser_executar.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser_executar.add_argument('--backends', nargs='+', default=['thread', 'process'], choices=Versao_P.BACKENDS)
+    parser_executar.add_argument('--repeticoes', type=int, default=3)
+    parser_executar.add_argument('--cache-colunar', action='store_true', help="Permite o uso do cache colunar durante as medições.")
+    parser_executar.add_argument('--saida', default='relatorio_benchmark', help="Prefixo dos arquivos .json e .csv do relatório.")
+    parser_executar.add_argument('--referencia', default=None, help="Relatório JSON anterior para detectar regressões.")
+    parser_executar.add_argument('--tolerancia', type=float, default=0.2, help="Aumento de tempo aceito em relação à referência (padrão: 20%%).")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'gerar':
+        caminhos = gerar_dados_sinteticos(args.diretorio, args.arquivos, args.linhas, args.tribunais, semente=args.semente)
+        print(f"{len(caminhos)} arquivo(s) gerado(s) em {args.diretorio}")
+    else:
+        resultados = executar_benchmark(args.linhas, args.workers, args.backends, args.arquivos, args.tribunais,
+                                        args.repeticoes, args.cache_colunar)
+        salvar_relatorio(resultados, args.saida)
+        if args.referencia:
+            regressoes = comparar_com_referencia(resultados, args.referencia, args.tolerancia)
+            for regressao in regressoes:
+                print(f"REGRESSÃO: {regressao}")
+            if regressoes:
+                sys.exit(1)
+        elif not all(medicao['metas_identicas'] for medicao in resultados):
+            print("As metas da versão paralela divergem da versão serial.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import shutil
+
+# Desligar para forçar a leitura dos CSVs (ex.: benchmarks de parsing).
+HABILITADO = True
+
+NOME_DIRETORIO_COLUNAR = '.colunar'
+ARQUIVO_META = 'meta.json'
+VERSAO_FORMATO = 3
+
+def diretorio_colunar(caminho_csv: str, colunas_completas: bool = False) -> str:
+    """
+    Diretório da versão colunar de um CSV: Dados/.colunar/<nome do arquivo>/<modo>,
+    com um .npy por coluna e um meta.json descrevendo tipos e dicionários das categorias.
+    """
+    pasta, nome_arquivo = os.path.split(os.path.abspath(caminho_csv))
+    modo = 'completo' if colunas_completas else 'schema'
+    return os.path.join(pasta, NOME_DIRETORIO_COLUNAR, os.path.splitext(nome_arquivo)[0], modo)
+
+def _descrever_csv(caminho_csv: str) -> dict:
+    estado = os.stat(caminho_csv)
+    return {'tamanho': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+def carregar_colunar(caminho_csv: str, colunas_completas: bool = False) -> pd.DataFrame | None:
+    """
+    Carrega a versão colunar do CSV via memory-map (np.load com mmap_mode='r'), sem copiar as colunas.
+    Retorna None se ela não existir ou se o CSV tiver sido alterado depois da conversão
+    (tamanho ou mtime diferentes dos registrados no meta.json).
+    """
+    diretorio = diretorio_colunar(caminho_csv, colunas_completas)
+    caminho_meta = os.path.join(diretorio, ARQUIVO_META)
+    try:
+        with open(caminho_meta, encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+        origem_atual = _descrever_csv(caminho_csv)
+    except (OSError, ValueError):
+        return None
+    if meta.get('versao') != VERSAO_FORMATO or meta.get('origem') != origem_atual:
+        return None
+
+    colunas = {}
+    try:
+        for indice, coluna in enumerate(meta['colunas']):
+            base = os.path.join(diretorio, str(indice))
+            if coluna['tipo'] == 'categorico':
+                codigos = np.load(base + '.npy', mmap_mode='r')
+                colunas[coluna['nome']] = pd.Categorical.from_codes(
+                    codigos, dtype=pd.CategoricalDtype(coluna['categorias'], ordered=False))
+            elif coluna['tipo'] == 'inteiro_nulavel':
+                valores = np.load(base + '.npy', mmap_mode='r')
+                mascara = np.load(base + '.mask.npy', mmap_mode='r')
+                colunas[coluna['nome']] = pd.arrays.IntegerArray(valores, mascara)
+            else:
+                colunas[coluna['nome']] = np.load(base + '.npy', mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    return pd.DataFrame(colunas, index=pd.RangeIndex(meta['linhas']), copy=False)
+
+def salvar_colunar(df: pd.DataFrame, caminho_csv: str, colunas_completas: bool = False) -> bool:
+    """
+    Grava a versão colunar de um DataFrame lido do CSV. Números viram .npy do mesmo dtype,
+    inteiros nulos viram valores + máscara e textos viram códigos + dicionário de categorias.
+    Retorna False (sem gravar nada) se alguma coluna tiver um tipo não suportado.
+    """
+    diretorio = diretorio_colunar(caminho_csv, colunas_completas)
+    temporario = f"{diretorio}.tmp-{os.getpid()}"
+    meta = {'versao': VERSAO_FORMATO, 'origem': _descrever_csv(caminho_csv), 'linhas': len(df), 'colunas': []}
+
+    try:
+        os.makedirs(temporario, exist_ok=True)
+        for indice, nome_coluna in enumerate(df.columns):
+            serie = df[nome_coluna]
+            base = os.path.join(temporario, str(indice))
+            if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(serie.dtype):
+                categorica = serie.astype('category')
+                categorias = categorica.cat.categories
+                if not all(isinstance(valor, str) for valor in categorias):
+                    raise TypeError(f"coluna {nome_coluna} com valores não textuais")
+                np.save(base + '.npy', categorica.cat.codes.to_numpy())
+                meta['colunas'].append({'nome': nome_coluna, 'tipo': 'categorico', 'categorias': list(categorias)})
+            elif isinstance(serie.array, pd.arrays.IntegerArray):
+                np.save(base + '.npy', serie.to_numpy(dtype=serie.dtype.numpy_dtype, na_value=0))
+                np.save(base + '.mask.npy', serie.isna().to_numpy())
+                meta['colunas'].append({'nome': nome_coluna, 'tipo': 'inteiro_nulavel'})
+            elif serie.dtype.kind in 'biuf':
+                np.save(base + '.npy', serie.to_numpy())
+                meta['colunas'].append({'nome': nome_coluna, 'tipo': 'numerico'})
+            else:
+                raise TypeError(f"coluna {nome_coluna} com dtype {serie.dtype} não suportado")
+
+        with open(os.path.join(temporario, ARQUIVO_META), 'w', encoding='utf-8') as arquivo:
+            json.dump(meta, arquivo, ensure_ascii=False)
+
+        shutil.rmtree(diretorio, ignore_errors=True)
+        os.replace(temporario, diretorio)
+        return True
+    except (OSError, TypeError):
+        shutil.rmtree(temporario, ignore_errors=True)
+        return False
@@ -0,0 +1,120 @@
+import pandas as pd
+import os
+import json
+import hashlib
+
+DIRETORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_metas')
+ARQUIVO_INDICE = 'indice.json'
+VERSAO_CACHE = 3
+
+def impressao_digital(caminho_arquivo: str, colunas_completas: bool = False, com_hash: bool = False) -> dict:
+    """
+    Identifica o estado atual de um arquivo: tamanho, mtime e, opcionalmente, o SHA-256 do conteúdo.
+    O modo de leitura (colunas completas ou schema) também faz parte da chave.
+    """
+    estado = os.stat(caminho_arquivo)
+    impressao = {
+        'tamanho': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+        'colunas_completas': colunas_completas
+    }
+    if com_hash:
+        sha256 = hashlib.sha256()
+        with open(caminho_arquivo, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                sha256.update(bloco)
+        impressao['sha256'] = sha256.hexdigest()
+    return impressao
+
+def carregar_indice(diretorio_cache: str = DIRETORIO_CACHE) -> dict:
+    """Carrega o índice do cache (caminho do CSV -> impressão digital e arquivo da entrada)."""
+    caminho_indice = os.path.join(diretorio_cache, ARQUIVO_INDICE)
+    try:
+        with open(caminho_indice, encoding='utf-8') as arquivo:
+            indice = json.load(arquivo)
+    except (OSError, ValueError):
+        return {}
+    if indice.get('versao') != VERSAO_CACHE:
+        return {}
+    return indice.get('arquivos', {})
+
+def salvar_indice(indice: dict, diretorio_cache: str = DIRETORIO_CACHE):
+    """Salva o índice do cache de forma atômica."""
+    os.makedirs(diretorio_cache, exist_ok=True)
+    caminho_indice = os.path.join(diretorio_cache, ARQUIVO_INDICE)
+    caminho_temporario = caminho_indice + '.tmp'
+    with open(caminho_temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump({'versao': VERSAO_CACHE, 'arquivos': indice}, arquivo, ensure_ascii=False, indent=1)
+    os.replace(caminho_temporario, caminho_indice)
+
+def _nome_entrada(caminho_arquivo: str) -> str:
+    return hashlib.sha1(os.path.abspath(caminho_arquivo).encode('utf-8')).hexdigest() + '.pkl'
+
+def _nome_dados(nome_entrada: str) -> str:
+    """Os dados compactos ficam em um pickle separado, para que linhas e somas possam ser lidas sem eles."""
+    return nome_entrada.removesuffix('.pkl') + '.dados.pkl'
+
+def _remover_arquivos_entrada(entrada: dict, diretorio_cache: str):
+    for nome in (entrada['arquivo'], _nome_dados(entrada['arquivo'])):
+        try:
+            os.remove(os.path.join(diretorio_cache, nome))
+        except OSError:
+            pass
+
+def buscar_no_cache(indice: dict, caminho_arquivo: str, impressao: dict,
+                    diretorio_cache: str = DIRETORIO_CACHE, com_dados: bool = True) -> dict | None:
+    """
+    Retorna a entrada em cache do arquivo ({'dados', 'linhas', 'somas'}) se a impressão digital
+    armazenada corresponder à atual, ou None caso o arquivo seja novo ou tenha mudado.
+    Com com_dados=False os dados compactos não são carregados ('dados' fica None); com com_dados=True
+    uma entrada gravada sem os dados também conta como ausente.
+    """
+    entrada = indice.get(os.path.abspath(caminho_arquivo))
+    if entrada is None:
+        return None
+    if any(entrada['impressao'].get(chave) != valor for chave, valor in impressao.items()):
+        return None
+    if com_dados and not entrada.get('com_dados'):
+        return None
+    try:
+        resultado = pd.read_pickle(os.path.join(diretorio_cache, entrada['arquivo']))
+        resultado['dados'] = pd.read_pickle(os.path.join(diretorio_cache, _nome_dados(entrada['arquivo']))) \
+            if com_dados else None
+        return resultado
+    except Exception:
+        return None
+
+def gravar_no_cache(indice: dict, caminho_arquivo: str, impressao: dict, dados: pd.DataFrame | None,
+                    linhas: list, somas: pd.DataFrame | None, diretorio_cache: str = DIRETORIO_CACHE):
+    """
+    Grava as linhas de metas e as somas parciais de um arquivo no cache e, em um pickle à parte,
+    os dados compactos (dados=None grava a entrada sem eles).
+    """
+    os.makedirs(diretorio_cache, exist_ok=True)
+    nome_entrada = _nome_entrada(caminho_arquivo)
+    caminho_dados = os.path.join(diretorio_cache, _nome_dados(nome_entrada))
+    if dados is not None:
+        pd.to_pickle(dados, caminho_dados)
+    elif os.path.exists(caminho_dados):
+        os.remove(caminho_dados)
+    pd.to_pickle({'linhas': linhas, 'somas': somas}, os.path.join(diretorio_cache, nome_entrada))
+    indice[os.path.abspath(caminho_arquivo)] = {'impressao': impressao, 'arquivo': nome_entrada,
+                                                'com_dados': dados is not None}
+
+def remover_ausentes(indice: dict, caminhos_atuais: list[str], diretorio_cache: str = DIRETORIO_CACHE) -> list[str]:
+    """Remove do cache as entradas de arquivos que não existem mais e retorna os caminhos removidos."""
+    atuais = {os.path.abspath(caminho) for caminho in caminhos_atuais}
+    removidos = [caminho for caminho in indice if caminho not in atuais]
+    for caminho in removidos:
+        _remover_arquivos_entrada(indice.pop(caminho), diretorio_cache)
+    return removidos
+
+def invalidar_entrada(caminho_arquivo: str, diretorio_cache: str = DIRETORIO_CACHE) -> bool:
+    """Remove do cache a entrada de um arquivo, forçando sua releitura na próxima execução incremental."""
+    indice = carregar_indice(diretorio_cache)
+    entrada = indice.pop(os.path.abspath(caminho_arquivo), None)
+    if entrada is None:
+        return False
+    salvar_indice(indice, diretorio_cache)
+    _remover_arquivos_entrada(entrada, diretorio_cache)
+    return True
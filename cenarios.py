@@ -0,0 +1,141 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import argparse
+
+import pipeline
+
+from meta_calculadora import somar_colunas_por_grupo, somas_das_linhas_do_resumo, termos_metas, \
+                             matriz_multiplicadores_base, dividir_metas, NOMES_REGRAS, COLUNAS_METAS, CHAVES_GRUPO
+
+from cache_metas import DIRETORIO_CACHE, impressao_digital, carregar_indice, buscar_no_cache
+
+from utils import ler_csv_tribunal
+
+# Colunas do arquivo de cenários: uma linha por alteração em relação a REGRAS_METAS.
+# ramo_justica vazio aplica a alteração a todas as regras que têm a meta; informe multiplicador ou alvo
+# (alvo X equivale ao multiplicador 1000 / X, a forma usada em REGRAS_METAS, ex.: 1000 / 9.5).
+COLUNAS_CENARIOS = ['cenario', 'ramo_justica', 'meta', 'multiplicador', 'alvo']
+
+CENARIO_BASE = 'base'
+
+def carregar_somas(usar_cache: bool = True, diretorio_cache: str = DIRETORIO_CACHE) -> pd.DataFrame:
+    """
+    Carrega, uma única vez, as somas de cada linha do resumo de metas (uma linha por tribunal/ramo, na ordem
+    do ResumoMetas). As somas por arquivo vêm do cache incremental (cache_metas) quando o arquivo não mudou;
+    os demais CSVs são lidos uma vez.
+    """
+    indice = carregar_indice(diretorio_cache) if usar_cache else {}
+    partes = []
+    for caminho_arquivo in pipeline._listar_arquivos_csv():
+        entrada = None
+        if indice:
+            for colunas_completas in (False, True):
+                impressao = impressao_digital(caminho_arquivo, colunas_completas)
+                entrada = buscar_no_cache(indice, caminho_arquivo, impressao, diretorio_cache, com_dados=False)
+                if entrada is not None:
+                    break
+        if entrada is not None:
+            somas = entrada['somas']
+        else:
+            try:
+                df_lido = ler_csv_tribunal(caminho_arquivo)
+            except Exception as e:
+                print(f"Erro ao ler o arquivo {os.path.basename(caminho_arquivo)}: {e}")
+                continue
+            somas = None
+            if not df_lido.empty and 'ramo_justica' in df_lido.columns:
+                somas = somar_colunas_por_grupo(df_lido, CHAVES_GRUPO)
+        if somas is not None:
+            partes.append(somas_das_linhas_do_resumo(somas))
+
+    if not partes:
+        return somas_das_linhas_do_resumo(pd.DataFrame())
+    return pd.concat(partes)
+
+def ler_cenarios(caminho_arquivo: str) -> pd.DataFrame:
+    """Lê o arquivo CSV de cenários (colunas de COLUNAS_CENARIOS; multiplicador ou alvo pode ficar vazio)."""
+    return pd.read_csv(caminho_arquivo, dtype={'cenario': str, 'ramo_justica': str, 'meta': str})
+
+def multiplicadores_dos_cenarios(cenarios: pd.DataFrame, incluir_base: bool = True) -> tuple[list[str], np.ndarray]:
+    """
+    Monta os multiplicadores de todos os cenários em um único array cenário × regra × meta,
+    partindo de REGRAS_METAS e aplicando as alterações de cada cenário.
+    """
+    cenarios = cenarios.reindex(columns=COLUNAS_CENARIOS)
+    nomes_cenarios = list(dict.fromkeys(cenarios['cenario'].astype(str)))
+    if incluir_base and CENARIO_BASE not in nomes_cenarios:
+        nomes_cenarios.insert(0, CENARIO_BASE)
+
+    metas = cenarios['meta'].astype(str).str.strip()
+    metas = metas.where(metas.str.startswith('Meta '), 'Meta ' + metas)
+    desconhecidas = set(metas) - set(COLUNAS_METAS)
+    if desconhecidas:
+        raise ValueError(f"Metas desconhecidas nos cenários: {sorted(desconhecidas)}")
+    ramos = cenarios['ramo_justica'].fillna('').astype(str).str.strip()
+    desconhecidos = set(ramos) - set(NOMES_REGRAS) - {''}
+    if desconhecidos:
+        raise ValueError(f"Ramos desconhecidos nos cenários: {sorted(desconhecidos)}")
+
+    multiplicadores_alteracao = pd.to_numeric(cenarios['multiplicador'], errors='coerce')
+    alvos = pd.to_numeric(cenarios['alvo'], errors='coerce')
+    valores = multiplicadores_alteracao.fillna(1000 / alvos).to_numpy(dtype='float64')
+    if np.isnan(valores).any():
+        raise ValueError("Cada linha de cenário precisa de um multiplicador ou de um alvo diferente de zero.")
+
+    base = matriz_multiplicadores_base()
+    multiplicadores = np.repeat(base[np.newaxis], len(nomes_cenarios), axis=0)
+
+    # Alterações sem ramo valem para todas as regras; as específicas de um ramo são aplicadas depois e prevalecem.
+    indice_cenario = np.array([nomes_cenarios.index(nome) for nome in cenarios['cenario'].astype(str)], dtype=int)
+    indice_meta = np.array([COLUNAS_METAS.index(meta) for meta in metas], dtype=int)
+    gerais = (ramos == '').to_numpy()
+    multiplicadores[indice_cenario[gerais], :, indice_meta[gerais]] = valores[gerais, np.newaxis]
+    indice_regra = np.array([NOMES_REGRAS.index(ramo) if ramo else -1 for ramo in ramos], dtype=int)
+    multiplicadores[indice_cenario[~gerais], indice_regra[~gerais], indice_meta[~gerais]] = valores[~gerais]
+
+    # Metas que não existem em uma regra continuam sem valor.
+    multiplicadores[:, np.isnan(base)] = np.nan
+    return nomes_cenarios, multiplicadores
+
+def avaliar_cenarios(somas: pd.DataFrame, cenarios: pd.DataFrame, incluir_base: bool = True) -> pd.DataFrame:
+    """
+    Avalia todos os cenários de uma vez sobre as somas de carregar_somas: os numeradores e denominadores
+    são calculados uma vez e cada cenário só troca os multiplicadores (um produto cenário × tribunal × meta).
+    Retorna uma linha por cenário, tribunal e meta aplicável, com o valor (NaN quando o denominador é zero).
+    """
+    nomes_cenarios, multiplicadores = multiplicadores_dos_cenarios(cenarios, incluir_base)
+    regras = somas.index.get_level_values('ramo_justica')
+    julgados, denominadores = termos_metas(somas, regras)
+    indices_regras = [NOMES_REGRAS.index(nome_regra) for nome_regra in regras]
+
+    valores = dividir_metas(julgados[np.newaxis] * multiplicadores[:, indices_regras], denominadores[np.newaxis])
+
+    aplicaveis = ~np.isnan(multiplicadores[:, indices_regras])
+    idx_cenario, idx_linha, idx_meta = np.nonzero(aplicaveis)
+    return pd.DataFrame({
+        'cenario': np.asarray(nomes_cenarios, dtype=object)[idx_cenario],
+        'sigla_tribunal': somas.index.get_level_values('sigla_tribunal')[idx_linha],
+        'ramo_justica': regras[idx_linha],
+        'meta': np.asarray(COLUNAS_METAS, dtype=object)[idx_meta],
+        'valor': valores[idx_cenario, idx_linha, idx_meta]
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Avalia cenários alternativos de multiplicadores e alvos das metas.")
+    parser.add_argument('cenarios', help=f"CSV de cenários com as colunas {', '.join(COLUNAS_CENARIOS)}.")
+    parser.add_argument('--saida', default='Cenarios.csv', help="CSV de saída (cenário × tribunal × meta).")
+    parser.add_argument('--sem-base', action='store_true', help=f"Não inclui o cenário '{CENARIO_BASE}' (REGRAS_METAS atuais).")
+    parser.add_argument('--no-cache', action='store_true', help="Lê todos os CSVs em vez de usar as somas do cache incremental.")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    somas = carregar_somas(usar_cache=not args.no_cache)
+    t1 = time.time()
+    resultado = avaliar_cenarios(somas, ler_cenarios(args.cenarios), incluir_base=not args.sem_base)
+    t2 = time.time()
+    resultado.to_csv(args.saida, index=False)
+
+    print(f"Somas carregadas: {len(somas)} linha(s) do resumo em {t1 - t0:.5f} segundos")
+    print(f"{resultado['cenario'].nunique()} cenário(s) avaliado(s) em {t2 - t1:.5f} segundos; resultado em {args.saida}")
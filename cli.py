@@ -0,0 +1,59 @@
+import sys
+import argparse
+
+# Só argparse é importado no início: pandas, o motor e as bibliotecas de gráficos são importados
+# dentro de cada subcomando, quando (e se) forem usados.
+
+def _calcular(argumentos: list[str], sufixo: str, com_consolidado: bool):
+    import pipeline
+
+    opcoes = ['--sem-graficos'] + ([] if com_consolidado else ['--sem-consolidado'])
+    pipeline.main([*opcoes, *argumentos], sufixo=sufixo, nome_versao='CLI',
+                  backend_padrao='thread', modo_padrao='incremental')
+
+def _graficos(arquivo_resumo: str, diretorio_graficos: str | None, formatos_graficos: str):
+    import pandas as pd
+    from utils import gerar_grafico
+
+    resumo_metas = pd.read_csv(arquivo_resumo, dtype={'sigla_tribunal': str, 'ramo_justica': str}, keep_default_na=False)
+    tempo_graficos = gerar_grafico(resumo_metas, diretorio_saida=diretorio_graficos, formatos=tuple(formatos_graficos.split(',')))
+    print(f"Tempo gerando gráficos de {arquivo_resumo}: {tempo_graficos:.5f} segundos")
+
+def main(argv: list[str] | None = None):
+    """Linha de comando única: compute, consolidate, plot e bench."""
+    parser = argparse.ArgumentParser(
+        description="Cálculo das metas dos tribunais. As demais opções de compute e consolidate são as do motor "
+                    "(python pipeline.py --help), ex.: --modo, --backend, --workers, --watch.")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_compute = subparsers.add_parser('compute', add_help=False,
+                                           help="Calcula as metas e grava somente ResumoMetas_<sufixo>.csv.")
+    parser_consolidate = subparsers.add_parser('consolidate', add_help=False,
+                                               help="Grava Consolidado_<sufixo>.csv e ResumoMetas_<sufixo>.csv.")
+    for subparser in (parser_compute, parser_consolidate):
+        subparser.add_argument('--sufixo', default='P', help="Sufixo dos arquivos de saída (padrão: P).")
+
+    parser_plot = subparsers.add_parser('plot', help="Gera os gráficos a partir de um ResumoMetas já calculado.")
+    parser_plot.add_argument('--sufixo', default='P', help="Usa ResumoMetas_<sufixo>.csv (padrão: P).")
+    parser_plot.add_argument('--resumo', default=None, help="Caminho do ResumoMetas (em vez de --sufixo).")
+    parser_plot.add_argument('--diretorio-graficos', default=None,
+                             help="Salva os gráficos neste diretório (sem janela interativa) em vez de exibi-los.")
+    parser_plot.add_argument('--formatos-graficos', default='png',
+                             help="Formatos dos gráficos salvos, separados por vírgula (ex.: png,svg).")
+
+    subparsers.add_parser('bench', add_help=False, help="Benchmark com dados sintéticos (opções de benchmark.py).")
+
+    args, argumentos = parser.parse_known_args(argv)
+
+    if args.comando in ('compute', 'consolidate'):
+        _calcular(argumentos, args.sufixo, com_consolidado=args.comando == 'consolidate')
+    elif args.comando == 'bench':
+        import benchmark
+        benchmark.main(argumentos)
+    else:
+        if argumentos:
+            parser.error(f"argumentos não reconhecidos: {' '.join(argumentos)}")
+        _graficos(args.resumo or f'ResumoMetas_{args.sufixo}.csv', args.diretorio_graficos, args.formatos_graficos)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,218 @@
+import os
+import queue
+import secrets
+import argparse
+import threading
+import multiprocessing
+import concurrent.futures
+from multiprocessing.managers import BaseManager
+
+# Configuração do coordenador: endereços dos trabalhadores ("host:porta,host:porta") e chave de autenticação.
+# Ficam em variáveis de ambiente para que o backend 'distribuido' do motor (pipeline.py) seja criado sem parâmetros.
+VARIAVEL_TRABALHADORES = 'METAS_TRABALHADORES'
+VARIAVEL_CHAVE = 'METAS_CHAVE'
+
+PORTA_PADRAO = 50_000
+TENTATIVAS_PADRAO = 3
+
+class Trabalhador:
+    """Objeto exposto pelo daemon: executa a função recebida e devolve (sucesso, resultado ou exceção)."""
+    def executar(self, funcao, args: tuple, kwargs: dict) -> tuple:
+        try:
+            return True, funcao(*args, **kwargs)
+        except Exception as exc:
+            return False, exc
+
+    def pid(self) -> int:
+        return os.getpid()
+
+class GerenciadorTrabalhador(BaseManager):
+    pass
+
+GerenciadorTrabalhador.register('Trabalhador', Trabalhador)
+
+def _ler_endereco(texto: str) -> tuple[str, int]:
+    host, _, porta = texto.strip().rpartition(':')
+    return host or '127.0.0.1', int(porta)
+
+def enderecos_do_ambiente() -> list[tuple[str, int]]:
+    """Endereços dos trabalhadores configurados em METAS_TRABALHADORES."""
+    return [_ler_endereco(texto) for texto in os.environ.get(VARIAVEL_TRABALHADORES, '').split(',') if texto.strip()]
+
+def configurar(enderecos: list[str] | str, chave: str):
+    """Define os trabalhadores e a chave usados pelo backend 'distribuido' (também nos processos filhos)."""
+    if not isinstance(enderecos, str):
+        enderecos = ','.join(enderecos)
+    os.environ[VARIAVEL_TRABALHADORES] = enderecos
+    os.environ[VARIAVEL_CHAVE] = chave
+
+def iniciar_trabalhador(endereco: tuple[str, int], chave: str, conexao_pronto=None):
+    """
+    Daemon trabalhador: atende as conexões do coordenador em endereco (TCP), uma thread por conexão.
+    Os arquivos são lidos pelos caminhos enviados pelo coordenador, então devem estar acessíveis
+    no mesmo caminho (mesma máquina ou diretório compartilhado).
+    """
+    servidor = GerenciadorTrabalhador(address=endereco, authkey=chave.encode('utf-8')).get_server()
+    host, porta = servidor.address
+    if conexao_pronto is not None:
+        conexao_pronto.send((host, porta))
+    print(f"Trabalhador {os.getpid()} aguardando tarefas em {host}:{porta}", flush=True)
+    servidor.serve_forever()
+
+def iniciar_trabalhadores_locais(quantidade: int, chave: str, host: str = '127.0.0.1') -> list[tuple]:
+    """
+    Inicia trabalhadores em processos separados nesta máquina, cada um em uma porta livre.
+    Retorna [(processo, 'host:porta')]; encerre-os com encerrar_trabalhadores_locais.
+    """
+    trabalhadores = []
+    for _ in range(quantidade):
+        recebe, envia = multiprocessing.Pipe(duplex=False)
+        processo = multiprocessing.Process(target=iniciar_trabalhador, args=((host, 0), chave, envia), daemon=True)
+        processo.start()
+        host_trabalhador, porta = recebe.recv()
+        trabalhadores.append((processo, f"{host_trabalhador}:{porta}"))
+    return trabalhadores
+
+def encerrar_trabalhadores_locais(trabalhadores: list[tuple]):
+    for processo, _ in trabalhadores:
+        processo.terminate()
+    for processo, _ in trabalhadores:
+        processo.join()
+
+class ExecutorDistribuido(concurrent.futures.Executor):
+    """
+    Executor do backend 'distribuido': cada tarefa submetida é enviada a um dos trabalhadores por TCP.
+    Há um despachante (thread com conexão própria) por trabalhador e tarefa simultânea. Se a conexão com
+    um trabalhador cai, a tarefa em andamento volta para a fila e é refeita por outro trabalhador, até
+    tentativas vezes; quando não resta nenhum trabalhador, as tarefas pendentes falham com ConnectionError.
+    As funções e argumentos precisam ser serializáveis (pickle) e importáveis nos trabalhadores.
+    """
+    def __init__(self, max_workers: int | None = None, enderecos: list | None = None, chave: str | None = None,
+                 tentativas: int = TENTATIVAS_PADRAO, tarefas_por_trabalhador: int = 1):
+        enderecos = [_ler_endereco(e) if isinstance(e, str) else e for e in enderecos] if enderecos else enderecos_do_ambiente()
+        if not enderecos:
+            raise ValueError(f"Nenhum trabalhador configurado (use --trabalhadores ou {VARIAVEL_TRABALHADORES}).")
+        chave = chave or os.environ.get(VARIAVEL_CHAVE)
+        if not chave:
+            raise ValueError(f"Chave de autenticação não configurada (use --chave ou {VARIAVEL_CHAVE}).")
+
+        self._chave = chave.encode('utf-8')
+        self._tentativas = tentativas
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self._pendentes = set()
+        self._despachantes = [
+            threading.Thread(target=self._despachar, args=(endereco,), daemon=True)
+            for endereco in enderecos for _ in range(tarefas_por_trabalhador)
+        ]
+        self._ativos = len(self._despachantes)
+        for despachante in self._despachantes:
+            despachante.start()
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        with self._trava:
+            if self._ativos == 0:
+                future.set_exception(ConnectionError("Nenhum trabalhador disponível."))
+                return future
+            self._pendentes.add(future)
+        future.add_done_callback(self._remover_pendente)
+        future.set_running_or_notify_cancel()
+        self._fila.put((future, fn, args, kwargs, 0))
+        return future
+
+    def _remover_pendente(self, future: concurrent.futures.Future):
+        with self._trava:
+            self._pendentes.discard(future)
+
+    def _despachar(self, endereco: tuple[str, int]):
+        nome = f"{endereco[0]}:{endereco[1]}"
+        try:
+            gerenciador = GerenciadorTrabalhador(address=endereco, authkey=self._chave)
+            gerenciador.connect()
+            trabalhador = gerenciador.Trabalhador()
+        except (OSError, EOFError, multiprocessing.AuthenticationError) as exc:
+            print(f"Trabalhador {nome} indisponível: {exc}")
+            self._encerrar_despachante()
+            return
+
+        while (item := self._fila.get()) is not None:
+            future, fn, args, kwargs, tentativas = item
+            try:
+                sucesso, resultado = trabalhador.executar(fn, args, kwargs)
+            except (OSError, EOFError) as exc:
+                print(f"Conexão com o trabalhador {nome} perdida: {exc}")
+                if tentativas + 1 < self._tentativas:
+                    self._fila.put((future, fn, args, kwargs, tentativas + 1))
+                else:
+                    future.set_exception(ConnectionError(f"Tarefa falhou em {tentativas + 1} trabalhador(es); último: {nome}"))
+                self._encerrar_despachante()
+                return
+            except Exception as exc:
+                # Argumentos que não serializam (PicklingError/TypeError aqui) ou resultado/exceção do trabalhador
+                # que não volta (RemoteError): a conexão continua boa, só esta tarefa falha.
+                future.set_exception(exc)
+                continue
+            if sucesso:
+                future.set_result(resultado)
+            else:
+                future.set_exception(resultado)
+
+    def _encerrar_despachante(self):
+        with self._trava:
+            self._ativos -= 1
+            if self._ativos > 0:
+                return
+        # Sem despachantes: falha o que ainda está na fila.
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[0].set_exception(ConnectionError("Nenhum trabalhador disponível."))
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        if wait:
+            with self._trava:
+                pendentes = set(self._pendentes)
+            concurrent.futures.wait(pendentes)
+        for _ in self._despachantes:
+            self._fila.put(None)
+        if wait:
+            for despachante in self._despachantes:
+                despachante.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modo distribuído (map-reduce) do cálculo de metas.")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_trabalhador = subparsers.add_parser('trabalhador', help="Inicia um daemon trabalhador.")
+    parser_trabalhador.add_argument('--host', default='127.0.0.1', help="Interface de escuta (padrão: 127.0.0.1).")
+    parser_trabalhador.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser_trabalhador.add_argument('--chave', default=os.environ.get(VARIAVEL_CHAVE),
+                                    help=f"Chave de autenticação compartilhada com o coordenador (ou {VARIAVEL_CHAVE}).")
+
+    parser_local = subparsers.add_parser('local', help="Inicia N trabalhadores nesta máquina e executa o coordenador.")
+    parser_local.add_argument('quantidade', type=int)
+    parser_local.add_argument('argumentos', nargs=argparse.REMAINDER,
+                              help="Opções repassadas ao motor (pipeline.py), ex.: --modo agendado.")
+    args = parser.parse_args()
+
+    if args.comando == 'trabalhador':
+        if not args.chave:
+            parser.error(f"informe --chave ou defina {VARIAVEL_CHAVE}")
+        iniciar_trabalhador((args.host, args.porta), args.chave)
+    else:
+        import pipeline
+
+        chave = secrets.token_hex(16)
+        trabalhadores = iniciar_trabalhadores_locais(args.quantidade, chave)
+        try:
+            configurar([endereco for _, endereco in trabalhadores], chave)
+            argumentos = [argumento for argumento in args.argumentos if argumento != '--']
+            # Modo padrão agendado (map-reduce por intervalos de linhas); um --modo em argumentos prevalece.
+            pipeline.main(['--backend', 'distribuido', '--modo', 'agendado', *argumentos],
+                          sufixo='P', nome_versao='Versão Distribuída')
+        finally:
+            encerrar_trabalhadores_locais(trabalhadores)
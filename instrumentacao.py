@@ -0,0 +1,105 @@
+import pandas as pd
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Caminho do arquivo JSON lines que recebe as medições. Fica em uma variável de ambiente
+# para que os processos dos pools (ProcessPoolExecutor) herdem a configuração.
+VARIAVEL_AMBIENTE = 'METAS_INSTRUMENTACAO'
+
+ETAPAS = ('leitura', 'parsing', 'filtro', 'calculo_metas', 'concatenacao', 'escrita', 'grafico')
+
+_trava_escrita = threading.Lock()
+_contexto = threading.local()
+
+def configurar(caminho_saida: str | None):
+    """Ativa a instrumentação gravando as medições em caminho_saida (JSON lines); None desativa."""
+    if caminho_saida is None:
+        os.environ.pop(VARIAVEL_AMBIENTE, None)
+        return
+    caminho_saida = os.path.abspath(caminho_saida)
+    open(caminho_saida, 'w', encoding='utf-8').close()
+    os.environ[VARIAVEL_AMBIENTE] = caminho_saida
+
+def habilitada() -> bool:
+    return bool(os.environ.get(VARIAVEL_AMBIENTE))
+
+def pico_rss_mb() -> float | None:
+    """Pico de memória residente (RSS) do processo atual, em MB."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS.
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+@contextlib.contextmanager
+def arquivo_em_processamento(caminho_arquivo: str):
+    """Define o arquivo atribuído às medições feitas nesta thread sem um arquivo explícito."""
+    anterior = getattr(_contexto, 'arquivo', None)
+    _contexto.arquivo = caminho_arquivo
+    try:
+        yield
+    finally:
+        _contexto.arquivo = anterior
+
+@contextlib.contextmanager
+def medir(etapa: str, arquivo: str | None = None, **metricas):
+    """
+    Mede a duração de uma etapa do pipeline (ver ETAPAS) e grava uma linha JSON com
+    etapa, arquivo, pid/thread do worker, duração, pico de RSS e as métricas informadas.
+    O dicionário retornado pode receber métricas durante a execução (ex.: registro['linhas'] = len(df)).
+    Sem configurar() nada é gravado e o custo é desprezível.
+    """
+    caminho_saida = os.environ.get(VARIAVEL_AMBIENTE)
+    arquivo = arquivo or getattr(_contexto, 'arquivo', None)
+    registro = {'etapa': etapa, 'arquivo': os.path.basename(arquivo) if arquivo else None, **metricas}
+    if not caminho_saida:
+        yield registro
+        return
+
+    registro.update({'pid': os.getpid(), 'thread': threading.current_thread().name, 'inicio': time.time()})
+    t0 = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro['duracao_s'] = time.perf_counter() - t0
+        registro['pico_rss_mb'] = pico_rss_mb()
+        linha = json.dumps(registro, ensure_ascii=False, default=str) + '\n'
+        with _trava_escrita, open(caminho_saida, 'a', encoding='utf-8') as saida:
+            saida.write(linha)
+
+def carregar_medicoes(caminho_saida: str | None = None) -> pd.DataFrame:
+    """Lê as medições gravadas em um DataFrame."""
+    caminho_saida = caminho_saida or os.environ.get(VARIAVEL_AMBIENTE)
+    with open(caminho_saida, encoding='utf-8') as entrada:
+        return pd.DataFrame([json.loads(linha) for linha in entrada if linha.strip()])
+
+def exportar_csv(caminho_csv: str, caminho_saida: str | None = None):
+    """Converte as medições (JSON lines) para CSV."""
+    carregar_medicoes(caminho_saida).to_csv(caminho_csv, index=False)
+
+def resumo_por_etapa(caminho_saida: str | None = None) -> pd.DataFrame:
+    """Totaliza as medições por etapa: número de medições, tempo total e máximo, linhas, bytes e pico de RSS."""
+    medicoes = carregar_medicoes(caminho_saida)
+    if medicoes.empty:
+        return medicoes
+    for coluna in ('linhas', 'bytes'):
+        if coluna not in medicoes.columns:
+            medicoes[coluna] = 0
+    return medicoes.groupby('etapa', sort=False).agg(
+        medicoes=('duracao_s', 'size'),
+        tempo_total_s=('duracao_s', 'sum'),
+        tempo_max_s=('duracao_s', 'max'),
+        linhas=('linhas', 'sum'),
+        bytes=('bytes', 'sum'),
+        pico_rss_mb=('pico_rss_mb', 'max'),
+        workers=('pid', 'nunique')
+    )
@@ -1,8 +1,227 @@
 import pandas as pd
 import numpy as np
 
+from instrumentacao import medir
+
 META_IDS = ['1', '2A', '2B', '2C', '2ANT', '4A', '4B', '6', '7A', '7B', '8A', '8B', '8', '10A', '10B', '10']
 
+# Regras de cada meta por ramo de justiça (ou tribunal superior):
+# (coluna de julgados, coluna de casos novos, coluna de dessobrestados ou None, coluna de suspensos, multiplicador)
+REGRAS_METAS = {
+    'Justiça Estadual': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 8.0)),
+        'Meta 2B': ('julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.0)),
+        'Meta 2C': ('julgm2_c', 'distm2_c', None, 'suspm2_c', (1000 / 9.5)),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
+        'Meta 4A': ('julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 6.5)),
+        'Meta 4B': ('julgm4_b', 'distm4_b', None, 'suspm4_b', 100.0),
+        'Meta 6': ('julgm6', 'distm6', None, 'suspm6', 100.0),
+        'Meta 7A': ('julgm7_a', 'distm7_a', None, 'suspm7_a', (1000 / 5.0)),
+        'Meta 7B': ('julgm7_b', 'distm7_b', None, 'suspm7_b', (1000 / 5.0)),
+        'Meta 8A': ('julgm8_a', 'distm8_a', None, 'suspm8_a', (1000 / 7.5)),
+        'Meta 8B': ('julgm8_b', 'distm8_b', None, 'suspm8_b', (1000 / 9.0)),
+        'Meta 10A': ('julgm10_a', 'distm10_a', None, 'suspm10_a', (1000 / 9.0)),
+        'Meta 10B': ('julgm10_b', 'distm10_b', None, 'suspm10_b', (1000 / 10.0))
+    },
+    'Justiça do Trabalho': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.4)),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0)
+    },
+    'Justiça Federal': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 8.5)),
+        'Meta 2B': ('julgm2_b', 'distm2_b', None, 'suspm2_b', 100.0),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
+        'Meta 4A': ('julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 7.0)),
+        'Meta 4B': ('julgm4_b', 'distm4_b', None, 'suspm4_b', 100.0),
+        'Meta 6': ('julgm6', 'distm6', None, 'suspm6', (1000 / 3.5)),
+        'Meta 7A': ('julgm7_a', 'distm7_a', None, 'suspm7_a', (1000 / 3.5)),
+        'Meta 7B': ('julgm7_b', 'distm7_b', None, 'suspm7_b', (1000 / 3.5)),
+        'Meta 8A': ('julgm8_a', 'distm8_a', None, 'suspm8_a', (1000 / 7.5)),
+        'Meta 8B': ('julgm8_b', 'distm8_b', None, 'suspm8_b', (1000 / 9.0)),
+        'Meta 10': ('julgm10', 'distm10', None, 'suspm10', (1000 / 10.0))
+    },
+    'Justiça Militar da União': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.5)),
+        'Meta 2B': ('julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.9)),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
+        'Meta 4A': ('julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.5)),
+        'Meta 4B': ('julgm4_b', 'distm4_b', None, 'suspm4_b', (1000 / 9.9))
+    },
+    'Justiça Militar Estadual': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.0)),
+        'Meta 2B': ('julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.5)),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
+        'Meta 4A': ('julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.5)),
+        'Meta 4B': ('julgm4_b', 'distm4_b', None, 'suspm4_b', (1000 / 9.9))
+    },
+    'Justiça Eleitoral': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 7.0)),
+        'Meta 2B': ('julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.9)),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
+        'Meta 4A': ('julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.0)),
+        'Meta 4B': ('julgm4_b', 'distm4_b', None, 'suspm4_b', (1000 / 5.0))
+    },
+    'Tribunal Superior do Trabalho': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2A': ('julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.5)),
+        'Meta 2B': ('julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.9)),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0)
+    },
+    'Superior Tribunal de Justiça': {
+        'Meta 1': ('julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
+        'Meta 2ANT': ('julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
+        'Meta 4A': ('julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.0)),
+        'Meta 4B': ('julgm4_b', 'distm4_b', None, 'suspm4_b', 100.0),
+        'Meta 6': ('julgm6_a', 'distm6_a', None, 'suspm6_a', (1000 / 7.5)),
+        'Meta 7A': ('julgm7_a', 'distm7_a', None, 'suspm7_a', (1000 / 7.5)),
+        'Meta 7B': ('julgm7_b', 'distm7_b', None, 'suspm7_b', (1000 / 7.5)),
+        'Meta 8': ('julgm8', 'distm8', None, 'suspm8', (1000 / 10.0)),
+        'Meta 10': ('julgm10', 'distm10', None, 'suspm10', (1000 / 10.0))
+    }
+}
+
+COLUNAS_CATEGORICAS = ['ramo_justica', 'sigla_tribunal']
+
+COLUNAS_NUMERICAS = list(dict.fromkeys(
+    coluna
+    for regras_ramo in REGRAS_METAS.values()
+    for regra in regras_ramo.values()
+    for coluna in regra[:4]
+    if coluna
+))
+
+COLUNAS_SCHEMA = COLUNAS_CATEGORICAS + COLUNAS_NUMERICAS
+
+DTYPES_SCHEMA = {
+    **{coluna: 'category' for coluna in COLUNAS_CATEGORICAS},
+    **{coluna: 'float64' for coluna in COLUNAS_NUMERICAS}
+}
+
+COLUNAS_METAS = [f'Meta {meta_id}' for meta_id in META_IDS]
+
+def _compilar_regras(regras_ramo: dict) -> tuple:
+    """
+    Converte as regras de um ramo em arrays de índices sobre COLUNAS_NUMERICAS.
+    A coluna de dessobrestados ausente aponta para uma coluna extra de zeros.
+    """
+    posicao = {coluna: indice for indice, coluna in enumerate(COLUNAS_NUMERICAS)}
+    coluna_zeros = len(COLUNAS_NUMERICAS)
+    nomes_metas = list(regras_ramo)
+    julgados, casos_novos, dessobrestados, suspensos, multiplicadores = zip(*regras_ramo.values())
+    return (
+        np.array([COLUNAS_METAS.index(nome_meta) for nome_meta in nomes_metas]),
+        np.array([posicao[coluna] for coluna in julgados]),
+        np.array([posicao[coluna] for coluna in casos_novos]),
+        np.array([posicao[coluna] if coluna else coluna_zeros for coluna in dessobrestados]),
+        np.array([posicao[coluna] for coluna in suspensos]),
+        np.array(multiplicadores, dtype='float64')
+    )
+
+REGRAS_COMPILADAS = {ramo: _compilar_regras(regras_ramo) for ramo, regras_ramo in REGRAS_METAS.items()}
+
+def _precisa_converter_para_soma(serie: pd.Series) -> bool:
+    """Colunas de texto precisam de pd.to_numeric e float32 é somado em float64 para não perder precisão."""
+    return not pd.api.types.is_numeric_dtype(serie) or serie.dtype == 'float32'
+
+def _valores_para_soma(serie: pd.Series) -> np.ndarray:
+    """Valores da coluna em float64 (texto passa por pd.to_numeric), com os ausentes como zero."""
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    return serie.to_numpy(dtype='float64', na_value=0.0)
+
+def somar_colunas_por_grupo(df: pd.DataFrame, chaves: list[str] | None = None) -> pd.DataFrame:
+    """
+    Soma todas as colunas numéricas do schema presentes no DataFrame.
+    Sem chaves retorna uma única linha; com chaves faz um groupby(...).sum() mantendo a ordem de aparição dos grupos.
+    As colunas que precisam de conversão (texto, float32) são somadas uma de cada vez em float64, com np.bincount
+    sobre os códigos dos grupos, para que só uma cópia convertida exista por vez.
+    Colunas que não existem no DataFrame ficam de fora (e serão tratadas como ausentes em avaliar_metas).
+    """
+    with medir('filtro', linhas=len(df)):
+        colunas = [coluna for coluna in COLUNAS_NUMERICAS if coluna in df.columns]
+        convertidas = [coluna for coluna in colunas if _precisa_converter_para_soma(df[coluna])]
+
+        if not chaves:
+            somas = pd.Series({coluna: _valores_para_soma(df[coluna]).sum() if coluna in convertidas
+                               else df[coluna].sum() for coluna in colunas},
+                              index=colunas, dtype='float64' if convertidas else None)
+            return somas.to_frame().T
+
+        agrupado = df.groupby(chaves, sort=False, observed=True, dropna=False)
+        somas = agrupado[[coluna for coluna in colunas if coluna not in convertidas]].sum()
+        if convertidas:
+            codigos = agrupado.ngroup().to_numpy()
+            for coluna in convertidas:
+                somas[coluna] = np.bincount(codigos, weights=_valores_para_soma(df[coluna]),
+                                            minlength=len(somas)).astype('float64', copy=False)
+        return somas[colunas]
+
+def combinar_somas(lista_somas: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combina somas parciais (de blocos de um arquivo ou de vários arquivos) somando os grupos iguais.
+    Os grupos mantêm a ordem de aparição; colunas ausentes em todas as partes continuam NaN.
+    """
+    somas = pd.concat(lista_somas)
+    niveis = list(range(somas.index.nlevels))
+    return somas.groupby(level=niveis, sort=False, dropna=False).sum(min_count=1)
+
+NOMES_REGRAS = list(REGRAS_METAS)
+
+def matriz_multiplicadores_base() -> np.ndarray:
+    """Multiplicadores de REGRAS_METAS em uma matriz (regra × meta, na ordem de NOMES_REGRAS e COLUNAS_METAS)."""
+    matriz = np.full((len(NOMES_REGRAS), len(COLUNAS_METAS)), np.nan)
+    for indice_regra, nome_regra in enumerate(NOMES_REGRAS):
+        idx_metas, *_, multiplicadores = REGRAS_COMPILADAS[nome_regra]
+        matriz[indice_regra, idx_metas] = multiplicadores
+    return matriz
+
+def termos_metas(somas: pd.DataFrame, regras_dos_grupos) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Numerador (soma dos julgados) e denominador (casos novos + dessobrestados - suspensos) de cada meta,
+    em matrizes grupo × COLUNAS_METAS. NaN quando a meta não se aplica à regra do grupo ou falta alguma coluna.
+    """
+    matriz = somas.reindex(columns=COLUNAS_NUMERICAS).to_numpy(dtype='float64', na_value=np.nan)
+    matriz = np.hstack([matriz, np.zeros((len(matriz), 1))])
+    julgados = np.full((len(matriz), len(COLUNAS_METAS)), np.nan)
+    denominadores = np.full((len(matriz), len(COLUNAS_METAS)), np.nan)
+    regras_dos_grupos = np.asarray(regras_dos_grupos, dtype=object)
+
+    for nome_regra, (idx_metas, idx_julgados, idx_casos_novos, idx_dessobrestados,
+                     idx_suspensos, _) in REGRAS_COMPILADAS.items():
+        linhas = np.flatnonzero(regras_dos_grupos == nome_regra)
+        if len(linhas) == 0:
+            continue
+        sub = matriz[linhas]
+        julgados[np.ix_(linhas, idx_metas)] = sub[:, idx_julgados]
+        denominadores[np.ix_(linhas, idx_metas)] = sub[:, idx_casos_novos] + sub[:, idx_dessobrestados] - sub[:, idx_suspensos]
+    return julgados, denominadores
+
+def dividir_metas(numeradores: np.ndarray, denominadores: np.ndarray) -> np.ndarray:
+    """numeradores / denominadores com NaN onde o denominador é zero (calcular_metas retorna None nesses casos)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valores = numeradores / denominadores
+    return np.where(denominadores == 0, np.nan, valores)
+
+def avaliar_metas(somas: pd.DataFrame, regras_dos_grupos) -> pd.DataFrame:
+    """
+    Avalia todas as metas de todos os grupos com operações NumPy.
+    'somas' tem uma linha por grupo com a soma de cada coluna (NaN ou ausência = coluna inexistente)
+    e 'regras_dos_grupos' indica, linha a linha, a chave de REGRAS_METAS a aplicar.
+    Retorna um DataFrame com uma coluna por meta; NaN quando a meta não se aplica ao ramo,
+    falta alguma coluna ou o denominador é zero (os casos em que calcular_metas retorna None).
+    """
+    julgados, denominadores = termos_metas(somas, regras_dos_grupos)
+    indices_regras = pd.Index(NOMES_REGRAS).get_indexer(regras_dos_grupos)
+    multiplicadores = matriz_multiplicadores_base()[indices_regras]
+    resultado = dividir_metas(julgados * multiplicadores, denominadores)
+    return pd.DataFrame(resultado, index=somas.index, columns=COLUNAS_METAS)
+
 def calcular_metas(df: pd.DataFrame, col_julgados: str, col_distm_casos_novos: str,
                    col_dessobrestados: str | None, col_suspensos: str, multiplicador: float) -> float | None:
     """
@@ -18,7 +237,8 @@ def calcular_metas(df: pd.DataFrame, col_julgados: str, col_distm_casos_novos: s
             return None
 
     for col in colunas_necessarias:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        if _precisa_converter_para_soma(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype('float64')
 
     try:
         if col_dessobrestados:
@@ -36,113 +256,44 @@ def calcular_metas(df: pd.DataFrame, col_julgados: str, col_distm_casos_novos: s
     except Exception:
         return None
 
+def _calcular_regras(df: pd.DataFrame, nome_regra: str) -> dict:
+    """Calcula as metas de um ramo (chave de REGRAS_METAS) com uma única soma das colunas."""
+    if df.empty: return {}
+    resultado = avaliar_metas(somar_colunas_por_grupo(df), [nome_regra]).iloc[0]
+    return {nome_meta: (None if pd.isna(resultado[nome_meta]) else resultado[nome_meta])
+            for nome_meta in REGRAS_METAS[nome_regra]}
+
 def metas_justica_estadual(df_estadual: pd.DataFrame) -> dict:
     """Calcula todas as metas para a Justiça Estadual."""
-    if df_estadual.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_estadual, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_estadual, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 8.0)),
-        'Meta 2B': calcular_metas(df_estadual, 'julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.0)),
-        'Meta 2C': calcular_metas(df_estadual, 'julgm2_c', 'distm2_c', None, 'suspm2_c', (1000 / 9.5)),
-        'Meta 2ANT': calcular_metas(df_estadual, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
-        'Meta 4A': calcular_metas(df_estadual, 'julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 6.5)),
-        'Meta 4B': calcular_metas(df_estadual, 'julgm4_b', 'distm4_b', None, 'suspm4_b', 100.0),
-        'Meta 6': calcular_metas(df_estadual, 'julgm6', 'distm6', None, 'suspm6', 100.0),
-        'Meta 7A': calcular_metas(df_estadual, 'julgm7_a', 'distm7_a', None, 'suspm7_a', (1000 / 5.0)),
-        'Meta 7B': calcular_metas(df_estadual, 'julgm7_b', 'distm7_b', None, 'suspm7_b', (1000 / 5.0)),
-        'Meta 8A': calcular_metas(df_estadual, 'julgm8_a', 'distm8_a', None, 'suspm8_a', (1000 / 7.5)),
-        'Meta 8B': calcular_metas(df_estadual, 'julgm8_b', 'distm8_b', None, 'suspm8_b', (1000 / 9.0)),
-        'Meta 10A': calcular_metas(df_estadual, 'julgm10_a', 'distm10_a', None, 'suspm10_a', (1000 / 9.0)),
-        'Meta 10B': calcular_metas(df_estadual, 'julgm10_b', 'distm10_b', None, 'suspm10_b', (1000 / 10.0))
-    }
+    return _calcular_regras(df_estadual, 'Justiça Estadual')
 
 def metas_justica_trabalho(df_trabalho: pd.DataFrame) -> dict:
     """Calcula todas as metas para a Justiça do Trabalho."""
-    if df_trabalho.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_trabalho, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_trabalho, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.4)),
-        'Meta 2ANT': calcular_metas(df_trabalho, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0)
-    }
+    return _calcular_regras(df_trabalho, 'Justiça do Trabalho')
 
 def metas_justica_federal(df_federal: pd.DataFrame) -> dict:
     """Calcula todas as metas para a Justiça Federal."""
-    if df_federal.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_federal, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_federal, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 8.5)),
-        'Meta 2B': calcular_metas(df_federal, 'julgm2_b', 'distm2_b', None, 'suspm2_b', 100.0),
-        'Meta 2ANT': calcular_metas(df_federal, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
-        'Meta 4A': calcular_metas(df_federal, 'julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 7.0)),
-        'Meta 4B': calcular_metas(df_federal, 'julgm4_b', 'distm4_b', None, 'suspm4_b', 100.0),
-        'Meta 6': calcular_metas(df_federal, 'julgm6', 'distm6', None, 'suspm6', (1000 / 3.5)),
-        'Meta 7A': calcular_metas(df_federal, 'julgm7_a', 'distm7_a', None, 'suspm7_a', (1000 / 3.5)),
-        'Meta 7B': calcular_metas(df_federal, 'julgm7_b', 'distm7_b', None, 'suspm7_b', (1000 / 3.5)),
-        'Meta 8A': calcular_metas(df_federal, 'julgm8_a', 'distm8_a', None, 'suspm8_a', (1000 / 7.5)),
-        'Meta 8B': calcular_metas(df_federal, 'julgm8_b', 'distm8_b', None, 'suspm8_b', (1000 / 9.0)),
-        'Meta 10': calcular_metas(df_federal, 'julgm10', 'distm10', None, 'suspm10', (1000 / 10.0))
-    }
+    return _calcular_regras(df_federal, 'Justiça Federal')
 
 def metas_justica_militar_uniao(df_jmu: pd.DataFrame) -> dict:
     """Calcula todas as metas para a Justiça Militar da União (fora o STM)."""
-    if df_jmu.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_jmu, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_jmu, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.5)),
-        'Meta 2B': calcular_metas(df_jmu, 'julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.9)),
-        'Meta 2ANT': calcular_metas(df_jmu, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
-        'Meta 4A': calcular_metas(df_jmu, 'julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.5)),
-        'Meta 4B': calcular_metas(df_jmu, 'julgm4_b', 'distm4_b', None, 'suspm4_b', (1000 / 9.9))
-    }
+    return _calcular_regras(df_jmu, 'Justiça Militar da União')
 
 def metas_justica_militar_estadual(df_jme: pd.DataFrame) -> dict:
     """Calcula todas as metas para a Justiça Militar Estadual."""
-    if df_jme.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_jme, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_jme, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.0)),
-        'Meta 2B': calcular_metas(df_jme, 'julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.5)),
-        'Meta 2ANT': calcular_metas(df_jme, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
-        'Meta 4A': calcular_metas(df_jme, 'julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.5)),
-        'Meta 4B': calcular_metas(df_jme, 'julgm4_b', 'distm4_b', None, 'suspm4_b', (1000 / 9.9))
-    }
+    return _calcular_regras(df_jme, 'Justiça Militar Estadual')
 
 def metas_justica_eleitoral(df_tre: pd.DataFrame) -> dict:
     """Calcula todas as metas para Justiça Eleitoral (TRE's)."""
-    if df_tre.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_tre, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_tre, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 7.0)),
-        'Meta 2B': calcular_metas(df_tre, 'julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.9)),
-        'Meta 2ANT': calcular_metas(df_tre, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
-        'Meta 4A': calcular_metas(df_tre, 'julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.0)),
-        'Meta 4B': calcular_metas(df_tre, 'julgm4_b', 'distm4_b', None, 'suspm4_b', (1000 / 5.0))
-    }
+    return _calcular_regras(df_tre, 'Justiça Eleitoral')
 
 def metas_tst(df_tst: pd.DataFrame) -> dict:
     """Calcula todas as metas para o Tribunal Superior do Trabalho (TST)."""
-    if df_tst.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_tst, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2A': calcular_metas(df_tst, 'julgm2_a', 'distm2_a', None, 'suspm2_a', (1000 / 9.5)),
-        'Meta 2B': calcular_metas(df_tst, 'julgm2_b', 'distm2_b', None, 'suspm2_b', (1000 / 9.9)),
-        'Meta 2ANT': calcular_metas(df_tst, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0)
-    }
+    return _calcular_regras(df_tst, 'Tribunal Superior do Trabalho')
 
 def metas_stj(df_stj: pd.DataFrame) -> dict:
     """Calcula todas as metas para o Superior Tribunal de Justiça (STJ)."""
-    if df_stj.empty: return {}
-    return {
-        'Meta 1': calcular_metas(df_stj, 'julgados_2025', 'casos_novos_2025', 'dessobrestados_2025', 'suspensos_2025', 100.0),
-        'Meta 2ANT': calcular_metas(df_stj, 'julgm2_ant', 'distm2_ant', None, 'suspm2_ant', 100.0),
-        'Meta 4A': calcular_metas(df_stj, 'julgm4_a', 'distm4_a', None, 'suspm4_a', (1000 / 9.0)),
-        'Meta 4B': calcular_metas(df_stj, 'julgm4_b', 'distm4_b', None, 'suspm4_b', 100.0),
-        'Meta 6': calcular_metas(df_stj, 'julgm6_a', 'distm6_a', None, 'suspm6_a', (1000 / 7.5)),
-        'Meta 7A': calcular_metas(df_stj, 'julgm7_a', 'distm7_a', None, 'suspm7_a', (1000 / 7.5)),
-        'Meta 7B': calcular_metas(df_stj, 'julgm7_b', 'distm7_b', None, 'suspm7_b', (1000 / 7.5)),
-        'Meta 8': calcular_metas(df_stj, 'julgm8', 'distm8', None, 'suspm8', (1000 / 10.0)),
-        'Meta 10': calcular_metas(df_stj, 'julgm10', 'distm10', None, 'suspm10', (1000 / 10.0))
-    }
+    return _calcular_regras(df_stj, 'Superior Tribunal de Justiça')
 
 FUNCOES_POR_RAMO = {
     'Justiça Estadual': metas_justica_estadual,
@@ -151,4 +302,106 @@ FUNCOES_POR_RAMO = {
     'Justiça Militar da União': metas_justica_militar_uniao,
     'Justiça Militar Estadual': metas_justica_militar_estadual,
     'Justiça Eleitoral': metas_justica_eleitoral
-}
\ No newline at end of file
+}
+# Nos Tribunais Superiores as metas são calculadas por sigla; siglas fora desta tabela (ex.: STM) não entram no resumo.
+RAMO_TRIBUNAIS_SUPERIORES = 'Tribunais Superiores'
+
+FUNCOES_POR_TRIBUNAL_SUPERIOR = {
+    'STJ': metas_stj,
+    'TST': metas_tst
+}
+
+RAMO_POR_TRIBUNAL_SUPERIOR = {
+    'STJ': 'Superior Tribunal de Justiça',
+    'TST': 'Tribunal Superior do Trabalho'
+}
+
+CHAVES_GRUPO = ['ramo_justica', 'sigla_tribunal']
+
+def linhas_metas_de_somas(somas: pd.DataFrame) -> list[dict]:
+    """
+    Monta as linhas do resumo de metas a partir das somas por (ramo_justica, sigla_tribunal).
+    Tribunais Superiores geram uma linha por sigla de FUNCOES_POR_TRIBUNAL_SUPERIOR; os demais ramos
+    de FUNCOES_POR_RAMO geram uma linha com a soma de todo o ramo, identificada pela primeira sigla encontrada.
+    """
+    with medir('calculo_metas', grupos=len(somas)):
+        return _linhas_metas_de_somas(somas)
+
+def somas_das_linhas_do_resumo(somas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrupa as somas por (ramo_justica, sigla_tribunal) nas linhas do resumo de metas, com as mesmas regras de
+    linhas_metas_de_somas. Retorna uma linha por linha do resumo, indexada por (sigla_tribunal, ramo_justica),
+    em que ramo_justica é a chave de REGRAS_METAS usada no cálculo.
+    """
+    indice_vazio = pd.MultiIndex.from_arrays([[], []], names=['sigla_tribunal', 'ramo_justica'])
+    if somas.empty:
+        return pd.DataFrame(index=indice_vazio, columns=somas.columns)
+
+    ramos = np.asarray(somas.index.get_level_values('ramo_justica'), dtype=object)
+    siglas = np.asarray(somas.index.get_level_values('sigla_tribunal'), dtype=object)
+
+    grupo_de_cada_linha = np.full(len(somas), -1)
+    identificacao_grupos = []
+    for ramo in pd.unique(ramos):
+        posicoes = np.flatnonzero(ramos == ramo)
+        if ramo == RAMO_TRIBUNAIS_SUPERIORES:
+            for posicao in posicoes:
+                if siglas[posicao] in FUNCOES_POR_TRIBUNAL_SUPERIOR:
+                    grupo_de_cada_linha[posicao] = len(identificacao_grupos)
+                    identificacao_grupos.append((siglas[posicao], RAMO_POR_TRIBUNAL_SUPERIOR[siglas[posicao]]))
+        elif ramo in FUNCOES_POR_RAMO:
+            grupo_de_cada_linha[posicoes] = len(identificacao_grupos)
+            identificacao_grupos.append((siglas[posicoes[0]], ramo))
+
+    if not identificacao_grupos:
+        return pd.DataFrame(index=indice_vazio, columns=somas.columns)
+
+    selecionadas = grupo_de_cada_linha >= 0
+    somas_grupos = somas[selecionadas].groupby(grupo_de_cada_linha[selecionadas]).sum(min_count=1)
+    somas_grupos.index = pd.MultiIndex.from_tuples(identificacao_grupos, names=['sigla_tribunal', 'ramo_justica'])
+    return somas_grupos
+
+def _linhas_metas_de_somas(somas: pd.DataFrame) -> list[dict]:
+    somas_grupos = somas_das_linhas_do_resumo(somas)
+    if somas_grupos.empty:
+        return []
+    metas = avaliar_metas(somas_grupos, somas_grupos.index.get_level_values('ramo_justica')).to_numpy()
+
+    linhas_metas = []
+    for indice, (sigla, ramo_registro) in enumerate(somas_grupos.index):
+        linha_completa = {'sigla_tribunal': sigla, 'ramo_justica': ramo_registro}
+        for nome_meta, valor in zip(COLUNAS_METAS, metas[indice]):
+            if nome_meta in REGRAS_METAS[ramo_registro]:
+                linha_completa[nome_meta] = None if np.isnan(valor) else valor
+            else:
+                linha_completa[nome_meta] = 'NA'
+        linhas_metas.append(linha_completa)
+    return linhas_metas
+
+def metas_por_grupo(somas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula as metas de cada grupo das somas, sem juntar os tribunais de um ramo: o índice tem ramo_justica,
+    sigla_tribunal e, opcionalmente, outras chaves (ex.: comarca). Tribunais Superiores usam a regra da sigla
+    (STJ/TST) e grupos de ramos sem regra ficam de fora. Retorna uma linha por grupo com as chaves, o ramo de
+    registro (como no resumo) e as metas, com 'NA' onde a meta não se aplica ou não pode ser calculada.
+    """
+    chaves = list(somas.index.names)
+    grupos = somas.index.to_frame(index=False)
+    ramos = grupos['ramo_justica'].astype(object)
+    regras = ramos.where(ramos.isin(FUNCOES_POR_RAMO),
+                         grupos['sigla_tribunal'].astype(object).map(RAMO_POR_TRIBUNAL_SUPERIOR)
+                         .where(ramos == RAMO_TRIBUNAIS_SUPERIORES))
+    selecionados = regras.notna().to_numpy()
+
+    with medir('calculo_metas', grupos=int(selecionados.sum())):
+        metas = avaliar_metas(somas[selecionados], regras[selecionados].to_numpy())
+    resultado = grupos[selecionados].reset_index(drop=True).assign(ramo_justica=regras[selecionados].to_numpy())
+    resultado = resultado[['sigla_tribunal', 'ramo_justica'] + [chave for chave in chaves if chave not in CHAVES_GRUPO]]
+    metas = metas.reset_index(drop=True).astype(object)
+    return pd.concat([resultado, metas.where(metas.notna(), 'NA')], axis=1)
+
+def calcular_linhas_metas(df: pd.DataFrame) -> list[dict]:
+    """Calcula as linhas do resumo de metas de um DataFrame com um único groupby por ramo e tribunal."""
+    if df.empty or 'ramo_justica' not in df.columns:
+        return []
+    return linhas_metas_de_somas(somar_colunas_por_grupo(df, CHAVES_GRUPO))
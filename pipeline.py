@@ -0,0 +1,1058 @@
+import pandas as pd
+import numpy as np
+import os
+import time
+import sys
+import argparse
+import asyncio
+import shutil
+import tempfile
+import concurrent.futures
+from pandas.api.types import union_categoricals
+
+from meta_calculadora import calcular_linhas_metas, somar_colunas_por_grupo, combinar_somas, \
+                             linhas_metas_de_somas, metas_por_grupo, CHAVES_GRUPO, META_IDS, COLUNAS_METAS
+
+from cache_metas import DIRETORIO_CACHE, impressao_digital, carregar_indice, salvar_indice, \
+                        buscar_no_cache, gravar_no_cache, remover_ausentes
+
+import instrumentacao
+from instrumentacao import medir, arquivo_em_processamento
+
+from agendador import TarefaArquivo, planejar_tarefas, executar_com_orcamento
+
+from utils import gerar_consolidado, gerar_resumo_metas, gerar_grafico, ler_csv_tribunal, \
+                  ler_intervalo_csv_tribunal, ler_csv_tribunal_em_chunks, colunas_do_consolidado, \
+                  dtypes_unificados, copiar_blocos_csv, reformatar_blocos_csv
+
+DIRETORIO_DADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dados')
+
+TAMANHO_CHUNK_PADRAO = 100_000
+INTERVALO_OBSERVACAO_PADRAO = 2.0
+
+def processar_arquivo_csv(caminho_arquivo: str, colunas_completas: bool = False,
+                          com_dados: bool = True) -> tuple[pd.DataFrame | None, list]:
+    """
+    Lê um arquivo CSV, calcula as metas para os ramos de justiça contidos nele,
+    e retorna o DataFrame lido e uma lista de linhas de metas.
+    Com colunas_completas=False apenas as colunas do schema das metas são lidas.
+    Com com_dados=False (sem Consolidado) o DataFrame lido não é retornado.
+    """
+    with arquivo_em_processamento(caminho_arquivo):
+        df_lido = None
+        try:
+            df_lido = ler_csv_tribunal(caminho_arquivo, colunas_completas)
+        except Exception as e:
+            print(f"Erro ao ler o arquivo {os.path.basename(caminho_arquivo)}: {e}")
+            return None, []
+
+        linhas_metas_arquivo = calcular_linhas_metas(df_lido)
+        return (df_lido if com_dados else None), linhas_metas_arquivo
+
+def compactar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduz o tamanho do DataFrame antes de enviá-lo entre processos:
+    colunas de texto repetitivas viram 'category' e inteiros usam a menor largura possível.
+    Os valores (e portanto o CSV gerado) permanecem os mesmos.
+    """
+    colunas_compactas = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        if pd.api.types.is_integer_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            colunas_compactas[coluna] = pd.to_numeric(serie, downcast='integer')
+        elif (pd.api.types.is_object_dtype(serie.dtype) or pd.api.types.is_string_dtype(serie.dtype)) \
+                and serie.nunique(dropna=True) <= len(serie) // 2:
+            colunas_compactas[coluna] = serie.astype('category')
+    if not colunas_compactas:
+        return df
+    return df.assign(**colunas_compactas)
+
+def _eh_texto(dtype) -> bool:
+    return isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype) \
+        or pd.api.types.is_string_dtype(dtype)
+
+def consolidar_dataframes(lista_dataframes: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Equivalente compacto de pd.concat(lista_dataframes, ignore_index=True): o CSV gerado é o mesmo,
+    mas cada coluna é montada uma vez já no schema compartilhado, sem as conversões intermediárias do concat.
+    - textos (object/str/category em todos os arquivos): uma única 'category' com o dicionário unificado;
+    - inteiros presentes em todos os arquivos: a menor largura que comporta os valores de todos eles;
+    - floats: o mesmo dtype que o concat escolheria (float32 continua float32), com NaN nas colunas ausentes.
+    Demais colunas (ex.: mistura de textos e números) seguem pelo pd.concat.
+    """
+    if not lista_dataframes:
+        return pd.concat(lista_dataframes, ignore_index=True)
+
+    # O dtype final de cada coluna é o que o concat produziria: basta concatenar a primeira linha de cada arquivo.
+    dtypes_concat = pd.concat([df.iloc[:1] for df in lista_dataframes], ignore_index=True).dtypes
+    tamanhos = [len(df) for df in lista_dataframes]
+
+    colunas = {}
+    colunas_concat = []
+    for coluna, dtype in dtypes_concat.items():
+        presentes = [df[coluna] for df in lista_dataframes if coluna in df.columns]
+        if _eh_texto(dtype) and all(_eh_texto(serie.dtype) for serie in presentes):
+            categoricas = {indice: df[coluna].astype('category')
+                           for indice, df in enumerate(lista_dataframes) if coluna in df.columns}
+            vazia = pd.CategoricalDtype(next(iter(categoricas.values())).cat.categories[:0])
+            partes = [categoricas[indice] if indice in categoricas else
+                      pd.Categorical.from_codes(np.full(tamanho, -1, dtype=np.int8), dtype=vazia)
+                      for indice, tamanho in enumerate(tamanhos)]
+            try:
+                colunas[coluna] = union_categoricals(partes, ignore_order=True)
+                continue
+            except TypeError:
+                pass
+        elif pd.api.types.is_integer_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype) \
+                and len(presentes) == len(lista_dataframes):
+            valores_limite = [valor for serie in presentes if len(serie) for valor in (serie.min(), serie.max())]
+            dtype_compacto = pd.to_numeric(pd.Series(valores_limite or [0], dtype=dtype), downcast='integer').dtype
+            colunas[coluna] = np.concatenate([serie.to_numpy(dtype=dtype_compacto) for serie in presentes])
+            continue
+        elif pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype) \
+                and all(serie.dtype.kind in 'iuf' and isinstance(serie.dtype, np.dtype) for serie in presentes):
+            colunas[coluna] = np.concatenate([
+                df[coluna].to_numpy(dtype=dtype) if coluna in df.columns else np.full(tamanho, np.nan, dtype=dtype)
+                for df, tamanho in zip(lista_dataframes, tamanhos)
+            ])
+            continue
+        colunas_concat.append(coluna)
+
+    if colunas_concat:
+        restantes = pd.concat([df[[coluna for coluna in colunas_concat if coluna in df.columns]] for df in lista_dataframes],
+                              ignore_index=True)
+        for coluna in colunas_concat:
+            colunas[coluna] = restantes[coluna]
+    return pd.DataFrame({coluna: colunas[coluna] for coluna in dtypes_concat.index},
+                        index=pd.RangeIndex(sum(tamanhos)), copy=False)
+
+def _processar_arquivo_em_processo(caminho_arquivo: str, colunas_completas: bool = False,
+                                   com_dados: bool = True) -> tuple[pd.DataFrame | None, list]:
+    """
+    Versão de processar_arquivo_csv usada pelos workers do backend 'process':
+    devolve apenas as linhas de metas e uma visão compacta dos dados lidos.
+    """
+    df_lido, linhas_metas_arquivo = processar_arquivo_csv(caminho_arquivo, colunas_completas, com_dados)
+    if df_lido is not None:
+        df_lido = compactar_dataframe(df_lido)
+    return df_lido, linhas_metas_arquivo
+
+def _processar_arquivo_para_cache(caminho_arquivo: str, colunas_completas: bool = False,
+                                  com_dados: bool = True) -> tuple | None:
+    """
+    Processa um arquivo para o modo incremental: devolve a visão compacta dos dados (None com com_dados=False),
+    as linhas de metas e as somas parciais por ramo e tribunal que vão para o cache. None se o arquivo não pôde ser lido.
+    """
+    with arquivo_em_processamento(caminho_arquivo):
+        try:
+            df_lido = ler_csv_tribunal(caminho_arquivo, colunas_completas)
+        except Exception as e:
+            print(f"Erro ao ler o arquivo {os.path.basename(caminho_arquivo)}: {e}")
+            return None
+
+        somas = None
+        linhas_metas_arquivo = []
+        if not df_lido.empty and 'ramo_justica' in df_lido.columns:
+            somas = somar_colunas_por_grupo(df_lido, CHAVES_GRUPO)
+            linhas_metas_arquivo = linhas_metas_de_somas(somas)
+        return (compactar_dataframe(df_lido) if com_dados else None), linhas_metas_arquivo, somas
+
+def _montar_resumo(linhas_metas: list) -> pd.DataFrame:
+    """Monta o DataFrame de resumo de metas com as colunas na ordem de META_IDS e 'NA' nos vazios."""
+    resumo_metas = pd.DataFrame(linhas_metas)
+    colunas_resumo = ['sigla_tribunal', 'ramo_justica'] + [f'Meta {m}' for m in META_IDS]
+    return resumo_metas.reindex(columns=colunas_resumo).fillna('NA')
+
+class ExecutorSerial(concurrent.futures.Executor):
+    """Executor do backend 'serial': cada tarefa roda na thread que a submete, no momento do submit."""
+    def __init__(self, max_workers: int | None = None):
+        pass
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+def _criar_executor_distribuido(max_workers: int | None = None) -> concurrent.futures.Executor:
+    """Backend 'distribuido': trabalhadores por TCP configurados em distribuido.configurar (ver distribuido.py)."""
+    from distribuido import ExecutorDistribuido
+    return ExecutorDistribuido(max_workers)
+
+# Backends disponíveis: nome -> fábrica do executor (recebe max_workers).
+# Os backends de BACKENDS_ENTRE_PROCESSOS recebem os dados compactados (compactar_dataframe) dos workers.
+# Nos de BACKENDS_DISTRIBUIDOS os dados nem voltam ao coordenador: os workers devolvem as somas parciais e
+# escrevem os dados em partes do consolidado, em um diretório que o coordenador também enxerga.
+BACKENDS = {
+    'thread': concurrent.futures.ThreadPoolExecutor,
+    'process': concurrent.futures.ProcessPoolExecutor,
+    'serial': ExecutorSerial,
+    'distribuido': _criar_executor_distribuido,
+}
+BACKENDS_ENTRE_PROCESSOS = {'process', 'distribuido'}
+BACKENDS_DISTRIBUIDOS = {'distribuido'}
+
+def registrar_backend(nome: str, fabrica, entre_processos: bool = False, distribuido: bool = False):
+    """Registra um novo backend: fabrica(max_workers=...) deve retornar um concurrent.futures.Executor."""
+    BACKENDS[nome] = fabrica
+    if entre_processos or distribuido:
+        BACKENDS_ENTRE_PROCESSOS.add(nome)
+    if distribuido:
+        BACKENDS_DISTRIBUIDOS.add(nome)
+
+def _validar_backend(backend: str):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend inválido: {backend}. Use um de {tuple(BACKENDS)}.")
+
+def _criar_executor(backend: str, max_workers: int | None) -> concurrent.futures.Executor:
+    """Cria o executor do backend informado."""
+    return BACKENDS[backend](max_workers=max_workers)
+
+def _executar_por_arquivo(backend: str, max_workers: int | None, funcao, lista_arquivos: list[str],
+                          indices, *args):
+    """
+    Executa funcao(caminho, *args) para os arquivos de lista_arquivos nas posições indices,
+    no executor do backend, e gera (indice, future) na ordem de conclusão.
+    """
+    with _criar_executor(backend, max_workers or os.cpu_count()) as executor:
+        future_to_index = {executor.submit(funcao, lista_arquivos[indice], *args): indice for indice in indices}
+        for future in concurrent.futures.as_completed(future_to_index):
+            yield future_to_index[future], future
+
+def _listar_arquivos_csv() -> list[str]:
+    """Lista os caminhos dos arquivos CSV de DIRETORIO_DADOS."""
+    return [
+        os.path.join(DIRETORIO_DADOS, nome_arquivo)
+        for nome_arquivo in os.listdir(DIRETORIO_DADOS)
+        if nome_arquivo.endswith('.csv')
+    ]
+
+def estado_dos_dados() -> dict[str, tuple[int, int]]:
+    """Tamanho e mtime (ns) de cada CSV de DIRETORIO_DADOS."""
+    estado = {}
+    for caminho_arquivo in _listar_arquivos_csv():
+        try:
+            estado_arquivo = os.stat(caminho_arquivo)
+        except OSError:
+            continue
+        estado[caminho_arquivo] = (estado_arquivo.st_size, estado_arquivo.st_mtime_ns)
+    return estado
+
+def observar_dados(intervalo: float = INTERVALO_OBSERVACAO_PADRAO, estado: dict | None = None):
+    """
+    Verifica DIRETORIO_DADOS a cada intervalo segundos e gera (novos_ou_alterados, removidos) quando algum CSV
+    chega, muda ou sai. Uma mudança só é informada depois de duas verificações seguidas iguais,
+    para não ler um arquivo que ainda está sendo copiado.
+    """
+    estado = estado_dos_dados() if estado is None else estado
+    anterior = estado
+    while True:
+        time.sleep(intervalo)
+        atual = estado_dos_dados()
+        if atual != anterior:
+            anterior = atual
+            continue
+        if atual != estado:
+            alterados = sorted(caminho for caminho, estado_arquivo in atual.items() if estado.get(caminho) != estado_arquivo)
+            removidos = sorted(set(estado) - set(atual))
+            estado = atual
+            yield alterados, removidos
+
+def gerar_metas_paralelizado(backend: str = 'thread', max_workers: int | None = None, colunas_completas: bool = False,
+                             arquivo_consolidado: str | None = None,
+                             com_consolidado: bool = True) -> tuple[pd.DataFrame | None, pd.DataFrame]:
+    """
+    Gera o DataFrame consolidado e o DataFrame de resumo de metas
+    processando os arquivos CSV no executor do backend: 'thread' (ThreadPoolExecutor),
+    'process' (ProcessPoolExecutor), 'serial' (sem pool) ou outro adicionado com registrar_backend.
+    Os resultados são mantidos na ordem dos arquivos, independente da ordem de conclusão.
+    Com colunas_completas=True o consolidado mantém todas as colunas dos arquivos.
+    Nos backends distribuídos cada arquivo é uma tarefa de map-reduce (ver gerar_metas_agendado):
+    o consolidado, se pedido em arquivo_consolidado, é escrito pelas partes e o retornado é None.
+    Com com_consolidado=False os workers não devolvem os dados e o consolidado retornado é None.
+    """
+    _validar_backend(backend)
+
+    lista_arquivos = _listar_arquivos_csv()
+    max_workers = max_workers or os.cpu_count()
+
+    if backend in BACKENDS_DISTRIBUIDOS:
+        tarefas = sorted((TarefaArquivo(caminho, None, None, os.path.getsize(caminho)) for caminho in lista_arquivos),
+                         key=lambda tarefa: tarefa.tamanho, reverse=True)
+        return _executar_tarefas(tarefas, lista_arquivos, 'paralelo', backend, max_workers, colunas_completas,
+                                 arquivo_consolidado=arquivo_consolidado, com_consolidado=com_consolidado)
+
+    resultados_por_arquivo = [None] * len(lista_arquivos)
+
+    print(f"\n--- Iniciando processamento de dados (backend '{backend}') ---")
+    tc_leitura_calculo = time.time()
+
+    funcao_worker = _processar_arquivo_em_processo if backend in BACKENDS_ENTRE_PROCESSOS else processar_arquivo_csv
+    for indice, future in _executar_por_arquivo(backend, max_workers, funcao_worker, lista_arquivos,
+                                                range(len(lista_arquivos)), colunas_completas, com_consolidado):
+        file_path = lista_arquivos[indice]
+        try:
+            resultados_por_arquivo[indice] = future.result()
+            print(f"Processamento concluído para: {os.path.basename(file_path)}")
+        except Exception as exc:
+            print(f"Arquivo {os.path.basename(file_path)} gerou uma exceção: {exc}")
+
+    total_dfs = []
+    todas_linhas_metas = []
+    for resultado in resultados_por_arquivo:
+        if resultado is None:
+            continue
+        df_lido, linhas_do_arquivo = resultado
+        if df_lido is not None:
+            total_dfs.append(df_lido)
+        todas_linhas_metas.extend(linhas_do_arquivo)
+
+    tc_fim_leitura_calculo = time.time()
+
+    t_consolidacao_df = time.time()
+    with medir('concatenacao', arquivos=len(total_dfs)):
+        df_consolidado = consolidar_dataframes(total_dfs) if com_consolidado else None
+        resumo_metas = _montar_resumo(todas_linhas_metas)
+    t_fim_consolidacao_df = time.time()
+
+    print(f"\nTempo lendo arquivos e calculando metas (paralelo): {tc_fim_leitura_calculo - tc_leitura_calculo:.5f} segundos")
+    print(f"Tempo consolidando DataFrame e criando resumo: {t_fim_consolidacao_df - t_consolidacao_df:.5f} segundos")
+
+    return df_consolidado, resumo_metas
+
+def _nome_parte_tarefa(arquivo_consolidado: str, tarefa: TarefaArquivo) -> str:
+    """Parte do consolidado com as linhas de uma tarefa (backends distribuídos)."""
+    return f"{_nome_parte(arquivo_consolidado, tarefa.caminho)}-{tarefa.inicio or 0}"
+
+def _escrever_parte(df: pd.DataFrame, parte: str, colunas_consolidado: list[str]) -> tuple[int, pd.DataFrame]:
+    """
+    Escreve as linhas de df (sem cabeçalho) em parte, substituindo o que houver de uma tentativa anterior,
+    e devolve o bloco escrito: tamanho em bytes e df.iloc[:0] (ver utils.copiar_blocos_csv).
+    """
+    with medir('escrita', parte, linhas=len(df)):
+        df.reindex(columns=colunas_consolidado).to_csv(parte, header=False, index=False)
+    return os.path.getsize(parte), df.iloc[:0]
+
+def _processar_tarefa(tarefa: TarefaArquivo, colunas_completas: bool = False, compactar: bool = False,
+                      com_dados: bool = True, arquivo_consolidado: str | None = None,
+                      colunas_consolidado: list[str] | None = None) -> tuple:
+    """
+    Processa uma tarefa do agendador (um arquivo inteiro ou um intervalo de linhas dele):
+    devolve os dados lidos e as somas parciais por ramo e tribunal, combinadas depois por arquivo.
+    Com com_dados=False os dados não voltam: são escritos na parte da tarefa ao lado de arquivo_consolidado
+    (se informado), e no lugar deles vem o bloco escrito (_escrever_parte), ou descartados (None).
+    """
+    with arquivo_em_processamento(tarefa.caminho):
+        if tarefa.inicio is None:
+            df_lido = ler_csv_tribunal(tarefa.caminho, colunas_completas)
+        else:
+            df_lido = ler_intervalo_csv_tribunal(tarefa.caminho, tarefa.inicio, tarefa.fim, colunas_completas)
+
+        somas = None
+        if not df_lido.empty and 'ramo_justica' in df_lido.columns:
+            somas = somar_colunas_por_grupo(df_lido, CHAVES_GRUPO)
+        if not com_dados:
+            bloco = None
+            if arquivo_consolidado is not None:
+                bloco = _escrever_parte(df_lido, _nome_parte_tarefa(arquivo_consolidado, tarefa), colunas_consolidado)
+            return bloco, somas
+        if compactar:
+            df_lido = compactar_dataframe(df_lido)
+        return df_lido, somas
+
+def _executar_tarefas(tarefas: list[TarefaArquivo], lista_arquivos: list[str], descricao: str, backend: str,
+                      max_workers: int, colunas_completas: bool = False, orcamento_bytes: int | None = None,
+                      arquivo_consolidado: str | None = None,
+                      com_consolidado: bool = True) -> tuple[pd.DataFrame | None, pd.DataFrame]:
+    """
+    Executa as tarefas no backend e reduz, por arquivo, as somas parciais das tarefas às linhas de metas.
+    Nos backends distribuídos os dados ficam com os trabalhadores: cada tarefa escreve a sua parte ao lado de
+    arquivo_consolidado (que precisa estar em um diretório compartilhado) e o coordenador junta as partes na
+    ordem dos arquivos e das linhas, com os dtypes informados por cada tarefa; sem arquivo_consolidado nenhum
+    dado é escrito. Nesses casos o consolidado
+    retornado é None. Com com_consolidado=False nenhum backend devolve ou escreve os dados.
+    """
+    distribuido = backend in BACKENDS_DISTRIBUIDOS
+    partes_por_arquivo = {caminho: [] for caminho in lista_arquivos}
+    arquivos_com_erro = set()
+    argumentos = (colunas_completas, backend in BACKENDS_ENTRE_PROCESSOS)
+    if not com_consolidado:
+        arquivo_consolidado = None
+    if not distribuido:
+        argumentos += (com_consolidado,)
+    else:
+        colunas_consolidado = None
+        if arquivo_consolidado is not None:
+            arquivo_consolidado = os.path.abspath(arquivo_consolidado)
+            colunas_consolidado = colunas_do_consolidado(lista_arquivos, colunas_completas)
+        argumentos += (False, arquivo_consolidado, colunas_consolidado)
+
+    print(f"\n--- Iniciando processamento de dados ({descricao}, backend '{backend}', "
+          f"{len(tarefas)} tarefa(s) para {len(lista_arquivos)} arquivo(s)) ---")
+    tc_leitura_calculo = time.time()
+
+    with _criar_executor(backend, max_workers) as executor:
+        for tarefa, future in executar_com_orcamento(executor, _processar_tarefa, tarefas, max_workers, orcamento_bytes,
+                                                     *argumentos):
+            try:
+                partes_por_arquivo[tarefa.caminho].append((tarefa, *future.result()))
+            except Exception as exc:
+                print(f"Erro ao ler o arquivo {os.path.basename(tarefa.caminho)}: {exc}")
+                arquivos_com_erro.add(tarefa.caminho)
+
+    total_dfs = []
+    todas_linhas_metas = []
+    for caminho in lista_arquivos:
+        partes = sorted(partes_por_arquivo[caminho], key=lambda parte: parte[0].inicio or 0)
+        if caminho in arquivos_com_erro:
+            partes = []
+        total_dfs.extend((tarefa, df) for tarefa, df, _ in partes)
+        somas = [somas_parte for _, _, somas_parte in partes if somas_parte is not None]
+        if somas:
+            todas_linhas_metas.extend(linhas_metas_de_somas(combinar_somas(somas)))
+        if caminho not in arquivos_com_erro:
+            print(f"Processamento concluído para: {os.path.basename(caminho)}")
+
+    tc_fim_leitura_calculo = time.time()
+
+    t_consolidacao_df = time.time()
+    with medir('concatenacao', arquivos=len(lista_arquivos) - len(arquivos_com_erro)):
+        if not distribuido:
+            df_consolidado = consolidar_dataframes([df for _, df in total_dfs]) if com_consolidado else None
+        else:
+            df_consolidado = None
+            if arquivo_consolidado is not None:
+                _juntar_partes(arquivo_consolidado, colunas_consolidado,
+                               [(_nome_parte_tarefa(arquivo_consolidado, tarefa), bloco) for tarefa, bloco in total_dfs],
+                               [_nome_parte_tarefa(arquivo_consolidado, tarefa) for tarefa in tarefas])
+        resumo_metas = _montar_resumo(todas_linhas_metas)
+    t_fim_consolidacao_df = time.time()
+
+    print(f"\nTempo lendo arquivos e calculando metas ({descricao}): {tc_fim_leitura_calculo - tc_leitura_calculo:.5f} segundos")
+    print(f"Tempo consolidando DataFrame e criando resumo: {t_fim_consolidacao_df - t_consolidacao_df:.5f} segundos")
+
+    return df_consolidado, resumo_metas
+
+def _juntar_partes(arquivo_consolidado: str, colunas_consolidado: list[str], partes: list[tuple[str, tuple]],
+                   todas_as_partes: list[str] = ()):
+    """
+    Escreve o cabeçalho do consolidado seguido das partes (nome e bloco escrito), na ordem e com os dtypes
+    unificados de todas elas, e remove as partes (inclusive as de tarefas com erro).
+    """
+    dtypes_consolidado = dtypes_unificados([bloco for _, bloco in partes])
+    pd.DataFrame(columns=colunas_consolidado).to_csv(arquivo_consolidado, index=False)
+    with open(arquivo_consolidado, 'ab') as saida:
+        for parte, bloco in partes:
+            with open(parte, 'rb') as entrada:
+                copiar_blocos_csv(entrada, saida, [bloco], colunas_consolidado, dtypes_consolidado)
+    for parte in {parte for parte, _ in partes} | set(todas_as_partes):
+        if os.path.exists(parte):
+            os.remove(parte)
+
+def gerar_metas_agendado(backend: str = 'process', max_workers: int | None = None, colunas_completas: bool = False,
+                         orcamento_memoria_mb: float | None = None, tamanho_max_tarefa_mb: float | None = None,
+                         arquivo_consolidado: str | None = None,
+                         com_consolidado: bool = True) -> tuple[pd.DataFrame | None, pd.DataFrame]:
+    """
+    Gera o consolidado e o resumo de metas com um agendamento que considera o tamanho dos arquivos:
+    as tarefas são submetidas da maior para a menor, arquivos grandes são divididos em intervalos de linhas
+    (tamanho_max_tarefa_mb) e, com orcamento_memoria_mb, a soma dos bytes de CSV em processamento
+    fica limitada ao orçamento. As somas parciais de cada arquivo são combinadas antes do cálculo das metas,
+    então o resultado é o mesmo de gerar_metas_paralelizado.
+    Nos backends distribuídos (map-reduce) só as somas parciais voltam dos trabalhadores; o consolidado,
+    se pedido em arquivo_consolidado, é escrito pelas partes e o retornado é None.
+    Com com_consolidado=False só as somas voltam, em qualquer backend, e o consolidado retornado é None.
+    """
+    _validar_backend(backend)
+
+    lista_arquivos = _listar_arquivos_csv()
+    max_workers = max_workers or os.cpu_count()
+    tamanho_max_tarefa = int(tamanho_max_tarefa_mb * 1024 * 1024) if tamanho_max_tarefa_mb else None
+    orcamento_bytes = int(orcamento_memoria_mb * 1024 * 1024) if orcamento_memoria_mb else None
+
+    tarefas = planejar_tarefas(lista_arquivos, max_workers, tamanho_max_tarefa)
+    return _executar_tarefas(tarefas, lista_arquivos, 'agendado', backend, max_workers, colunas_completas,
+                             orcamento_bytes, arquivo_consolidado, com_consolidado)
+
+def processar_arquivo_csv_em_chunks(caminho_arquivo: str, arquivo_consolidado: str, colunas_consolidado: list[str],
+                                    tamanho_chunk: int = TAMANHO_CHUNK_PADRAO,
+                                    colunas_completas: bool = False) -> tuple[list, list]:
+    """
+    Lê o CSV em blocos de tamanho_chunk linhas, acrescentando cada bloco ao final de arquivo_consolidado
+    e acumulando as somas por ramo e tribunal. As metas são calculadas no fim a partir das somas combinadas,
+    então a memória usada depende do tamanho do bloco e não do tamanho do arquivo.
+    Retorna as linhas de metas e os blocos escritos (tamanho em bytes e chunk.iloc[:0]), com os quais os dtypes
+    de todos os blocos são unificados no fim (utils.reformatar_blocos_csv).
+    Em caso de erro, as linhas já escritas deste arquivo são removidas do consolidado.
+    """
+    somas = None
+    blocos = []
+    with arquivo_em_processamento(caminho_arquivo), \
+            open(arquivo_consolidado, 'a', newline='', encoding='utf-8') as saida:
+        posicao_inicial = saida.tell()
+        try:
+            leitor = ler_csv_tribunal_em_chunks(caminho_arquivo, tamanho_chunk, colunas_completas)
+            while True:
+                with medir('parsing') as registro:
+                    chunk = next(leitor, None)
+                    registro['linhas'] = 0 if chunk is None else len(chunk)
+                if chunk is None:
+                    break
+                with medir('escrita', linhas=len(chunk)):
+                    inicio_bloco = saida.tell()
+                    chunk.reindex(columns=colunas_consolidado).to_csv(saida, header=False, index=False)
+                    blocos.append((saida.tell() - inicio_bloco, chunk.iloc[:0]))
+                if 'ramo_justica' not in chunk.columns:
+                    continue
+                somas_chunk = somar_colunas_por_grupo(chunk, CHAVES_GRUPO)
+                somas = somas_chunk if somas is None else combinar_somas([somas, somas_chunk])
+        except Exception as e:
+            print(f"Erro ao ler o arquivo {os.path.basename(caminho_arquivo)}: {e}")
+            saida.truncate(posicao_inicial)
+            return [], []
+
+        if somas is None:
+            return [], blocos
+        return linhas_metas_de_somas(somas), blocos
+
+def _nome_parte(arquivo_consolidado: str, caminho_arquivo: str) -> str:
+    """Parte temporária do consolidado com as linhas de um arquivo (modo streaming com workers)."""
+    return f"{arquivo_consolidado}.parte-{os.path.basename(caminho_arquivo)}"
+
+def _processar_arquivo_em_chunks_na_parte(caminho_arquivo: str, arquivo_consolidado: str, *args) -> tuple[list, list]:
+    parte = _nome_parte(arquivo_consolidado, caminho_arquivo)
+    # A parte começa vazia, para que uma tarefa refeita (ex.: trabalhador distribuído que caiu) não duplique linhas.
+    if os.path.exists(parte):
+        os.remove(parte)
+    return processar_arquivo_csv_em_chunks(caminho_arquivo, parte, *args)
+
+def gerar_metas_streaming(arquivo_consolidado: str = 'Consolidado_P.csv', tamanho_chunk: int = TAMANHO_CHUNK_PADRAO,
+                          backend: str = 'serial', max_workers: int | None = None,
+                          colunas_completas: bool = False) -> pd.DataFrame:
+    """
+    Modo streaming: processa os CSVs em blocos, escrevendo o consolidado diretamente em arquivo_consolidado
+    sem manter a concatenação completa em memória, e retorna o DataFrame de resumo de metas.
+    Com os backends 'thread' e 'process' cada arquivo é escrito em uma parte temporária,
+    anexada ao consolidado na ordem dos arquivos ao final. Os dtypes de cada coluna são os que o pd.concat de
+    todos os blocos daria, reconciliados ao final (só os blocos cuja formatação muda são reescritos).
+    """
+    _validar_backend(backend)
+
+    lista_arquivos = _listar_arquivos_csv()
+    colunas_consolidado = colunas_do_consolidado(lista_arquivos, colunas_completas)
+    linhas_por_arquivo = [[] for _ in lista_arquivos]
+    blocos_por_arquivo = [[] for _ in lista_arquivos]
+
+    print(f"\n--- Iniciando processamento de dados (streaming em blocos de {tamanho_chunk} linhas) ---")
+    tc_leitura_calculo = time.time()
+
+    pd.DataFrame(columns=colunas_consolidado).to_csv(arquivo_consolidado, index=False)
+
+    if backend == 'serial':
+        for indice, arq_path in enumerate(lista_arquivos):
+            linhas_por_arquivo[indice], blocos_por_arquivo[indice] = processar_arquivo_csv_em_chunks(
+                arq_path, arquivo_consolidado, colunas_consolidado, tamanho_chunk, colunas_completas)
+            print(f"Processamento concluído para: {os.path.basename(arq_path)}")
+        blocos = [bloco for blocos_do_arquivo in blocos_por_arquivo for bloco in blocos_do_arquivo]
+        reformatar_blocos_csv(arquivo_consolidado, blocos, colunas_consolidado, dtypes_unificados(blocos))
+    else:
+        # Caminho absoluto: os trabalhadores dos backends distribuídos não rodam no diretório do coordenador.
+        arquivo_partes = os.path.abspath(arquivo_consolidado)
+        partes = [_nome_parte(arquivo_partes, arq_path) for arq_path in lista_arquivos]
+        for indice, future in _executar_por_arquivo(backend, max_workers, _processar_arquivo_em_chunks_na_parte,
+                                                    lista_arquivos, range(len(lista_arquivos)), arquivo_partes,
+                                                    colunas_consolidado, tamanho_chunk, colunas_completas):
+            try:
+                linhas_por_arquivo[indice], blocos_por_arquivo[indice] = future.result()
+                print(f"Processamento concluído para: {os.path.basename(lista_arquivos[indice])}")
+            except Exception as exc:
+                print(f"Arquivo {os.path.basename(lista_arquivos[indice])} gerou uma exceção: {exc}")
+
+        dtypes_consolidado = dtypes_unificados([bloco for blocos in blocos_por_arquivo for bloco in blocos])
+        with medir('concatenacao', arquivos=len(partes)), open(arquivo_consolidado, 'ab') as saida:
+            for parte, blocos in zip(partes, blocos_por_arquivo):
+                if os.path.exists(parte):
+                    with open(parte, 'rb') as entrada:
+                        copiar_blocos_csv(entrada, saida, blocos, colunas_consolidado, dtypes_consolidado)
+                    os.remove(parte)
+
+    tc_fim_leitura_calculo = time.time()
+
+    resumo_metas = _montar_resumo([linha for linhas in linhas_por_arquivo for linha in linhas])
+
+    print(f"\nTempo lendo arquivos, calculando metas e escrevendo {arquivo_consolidado} (streaming): "
+          f"{tc_fim_leitura_calculo - tc_leitura_calculo:.5f} segundos")
+
+    return resumo_metas
+
+def _somar_arquivo_na_parte(caminho_arquivo: str, colunas_completas: bool, arquivo_consolidado: str,
+                            colunas_consolidado: list[str]) -> tuple[str, tuple, pd.DataFrame | None]:
+    """
+    Worker dos backends distribuídos no modo pipeline: escreve os dados do arquivo em uma parte ao lado de
+    arquivo_consolidado e devolve apenas o nome da parte, o bloco escrito e as somas parciais por ramo e tribunal.
+    """
+    with arquivo_em_processamento(caminho_arquivo):
+        df_lido = ler_csv_tribunal(caminho_arquivo, colunas_completas)
+        somas = None
+        if not df_lido.empty and 'ramo_justica' in df_lido.columns:
+            somas = somar_colunas_por_grupo(df_lido, CHAVES_GRUPO)
+        parte = _nome_parte(arquivo_consolidado, caminho_arquivo)
+        return parte, _escrever_parte(df_lido, parte, colunas_consolidado), somas
+
+def _anexar_resultado(df_lido: pd.DataFrame | tuple | None, linhas_do_arquivo: list, arquivo_consolidado: str,
+                      colunas_consolidado: list[str], arquivo_resumo: str) -> tuple | None:
+    """
+    Acrescenta os dados de um arquivo ao consolidado e as suas linhas de metas ao resumo, e devolve o bloco
+    escrito no consolidado (tamanho em bytes e df.iloc[:0]). df_lido também pode ser (parte, bloco), uma parte
+    já escrita por um trabalhador distribuído (_somar_arquivo_na_parte), que é copiada e removida.
+    """
+    bloco = None
+    if isinstance(df_lido, tuple):
+        parte, bloco = df_lido
+        with medir('escrita', arquivo_consolidado), open(parte, 'rb') as entrada, \
+                open(arquivo_consolidado, 'ab') as saida:
+            shutil.copyfileobj(entrada, saida)
+        os.remove(parte)
+    elif df_lido is not None:
+        with medir('escrita', arquivo_consolidado, linhas=len(df_lido)):
+            tamanho_anterior = os.path.getsize(arquivo_consolidado)
+            df_lido.reindex(columns=colunas_consolidado).to_csv(arquivo_consolidado, mode='a', header=False, index=False)
+            bloco = (os.path.getsize(arquivo_consolidado) - tamanho_anterior, df_lido.iloc[:0])
+    if linhas_do_arquivo:
+        with medir('escrita', arquivo_resumo, linhas=len(linhas_do_arquivo)):
+            _montar_resumo(linhas_do_arquivo).to_csv(arquivo_resumo, mode='a', header=False, index=False)
+    return bloco
+
+async def _escritor_pipeline(fila: asyncio.Queue, executor_escrita: concurrent.futures.Executor,
+                             lista_arquivos: list[str], *destino) -> list:
+    """
+    Consome os resultados da fila e os escreve em segundo plano, na ordem dos arquivos:
+    um resultado que chega antes dos anteriores aguarda até que eles sejam escritos.
+    Retorna os blocos escritos no consolidado, na ordem.
+    """
+    loop = asyncio.get_running_loop()
+    prontos = {}
+    proximo = 0
+    blocos = []
+    while (item := await fila.get()) is not None:
+        indice, (df_lido, linhas_do_arquivo) = item
+        prontos[indice] = (df_lido, linhas_do_arquivo)
+        while proximo in prontos:
+            df_lido, linhas_do_arquivo = prontos.pop(proximo)
+            bloco = await loop.run_in_executor(executor_escrita, _anexar_resultado, df_lido, linhas_do_arquivo, *destino)
+            if bloco is not None:
+                blocos.append(bloco)
+            print(f"Escrito: {os.path.basename(lista_arquivos[proximo])} ({len(linhas_do_arquivo)} linha(s) de metas)")
+            proximo += 1
+    return blocos
+
+async def _executar_pipeline(lista_arquivos: list[str], arquivo_consolidado: str, arquivo_resumo: str,
+                             backend: str, max_workers: int, colunas_completas: bool) -> list:
+    loop = asyncio.get_running_loop()
+    colunas_consolidado = colunas_do_consolidado(lista_arquivos, colunas_completas)
+    distribuido = backend in BACKENDS_DISTRIBUIDOS
+    if distribuido:
+        # Os trabalhadores escrevem os dados em partes (diretório compartilhado) e devolvem só as somas parciais.
+        funcao_worker = _somar_arquivo_na_parte
+        argumentos = (colunas_completas, os.path.abspath(arquivo_consolidado), colunas_consolidado)
+    else:
+        funcao_worker = _processar_arquivo_em_processo if backend in BACKENDS_ENTRE_PROCESSOS else processar_arquivo_csv
+        argumentos = (colunas_completas,)
+    if backend == 'serial':
+        # O executor serial bloquearia o loop de eventos; um worker em thread mantém a escrita sobreposta.
+        backend, max_workers = 'thread', 1
+
+    pd.DataFrame(columns=colunas_consolidado).to_csv(arquivo_consolidado, index=False)
+    _montar_resumo([]).to_csv(arquivo_resumo, index=False)
+
+    linhas_por_arquivo = [[] for _ in lista_arquivos]
+    fila = asyncio.Queue()
+
+    with _criar_executor(backend, max_workers) as executor, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor_escrita:
+        escritor = asyncio.create_task(_escritor_pipeline(fila, executor_escrita, lista_arquivos, arquivo_consolidado,
+                                                          colunas_consolidado, arquivo_resumo))
+
+        async def processar(indice: int, arq_path: str):
+            try:
+                resultado = await loop.run_in_executor(executor, funcao_worker, arq_path, *argumentos)
+                if distribuido:
+                    parte, bloco, somas = resultado
+                    resultado = ((parte, bloco), [] if somas is None else linhas_metas_de_somas(somas))
+                print(f"Processamento concluído para: {os.path.basename(arq_path)}")
+            except Exception as exc:
+                print(f"Arquivo {os.path.basename(arq_path)} gerou uma exceção: {exc}")
+                resultado = (None, [])
+            linhas_por_arquivo[indice] = resultado[1]
+            await fila.put((indice, resultado))
+
+        await asyncio.gather(*(processar(indice, arq_path) for indice, arq_path in enumerate(lista_arquivos)))
+        await fila.put(None)
+        blocos = await escritor
+
+    # Os dtypes só são conhecidos com todos os arquivos lidos: os blocos escritos com uma coluna inteira que
+    # acabou float em outro arquivo são reformatados (no caso comum nada muda e o arquivo não é tocado).
+    reformatar_blocos_csv(arquivo_consolidado, blocos, colunas_consolidado, dtypes_unificados(blocos))
+
+    return [linha for linhas in linhas_por_arquivo for linha in linhas]
+
+def gerar_metas_pipeline(arquivo_consolidado: str = 'Consolidado_P.csv', arquivo_resumo: str = 'ResumoMetas_P.csv',
+                         backend: str = 'thread', max_workers: int | None = None,
+                         colunas_completas: bool = False) -> pd.DataFrame:
+    """
+    Modo pipeline (asyncio): a leitura e o cálculo rodam no executor do backend enquanto um escritor em
+    segundo plano acrescenta cada arquivo concluído a arquivo_consolidado e as suas linhas de metas a
+    arquivo_resumo, na ordem dos arquivos. Assim a escrita se sobrepõe ao parsing dos arquivos seguintes.
+    Retorna o DataFrame de resumo de metas (já gravado em arquivo_resumo).
+    """
+    _validar_backend(backend)
+
+    lista_arquivos = _listar_arquivos_csv()
+
+    print(f"\n--- Iniciando processamento de dados (pipeline, backend '{backend}') ---")
+    tc_inicio = time.time()
+
+    todas_linhas_metas = asyncio.run(_executar_pipeline(lista_arquivos, arquivo_consolidado, arquivo_resumo,
+                                                        backend, max_workers or os.cpu_count(), colunas_completas))
+    resumo_metas = _montar_resumo(todas_linhas_metas)
+
+    print(f"\nTempo lendo, calculando e escrevendo {arquivo_consolidado} e {arquivo_resumo} (pipeline): "
+          f"{time.time() - tc_inicio:.5f} segundos")
+
+    return resumo_metas
+
+def gerar_metas_incremental(backend: str = 'thread', max_workers: int | None = None, colunas_completas: bool = False,
+                            com_hash: bool = False, diretorio_cache: str = DIRETORIO_CACHE,
+                            com_consolidado: bool = True) -> tuple[pd.DataFrame | None, pd.DataFrame]:
+    """
+    Gera o consolidado e o resumo de metas reaproveitando o cache em disco:
+    apenas arquivos novos ou alterados (tamanho, mtime e, com com_hash=True, o SHA-256) são lidos;
+    os demais vêm do cache. Entradas de arquivos que saíram de DIRETORIO_DADOS são removidas.
+    Com com_consolidado=False só as linhas de metas são carregadas do cache (os dados compactos não)
+    e o consolidado retornado é None.
+    """
+    _validar_backend(backend)
+
+    lista_arquivos = _listar_arquivos_csv()
+    resultados_por_arquivo = [None] * len(lista_arquivos)
+
+    print(f"\n--- Iniciando processamento de dados (incremental, backend '{backend}') ---")
+    tc_leitura_calculo = time.time()
+
+    indice = carregar_indice(diretorio_cache)
+    removidos = remover_ausentes(indice, lista_arquivos, diretorio_cache)
+
+    pendentes = {}
+    for indice_arquivo, arq_path in enumerate(lista_arquivos):
+        impressao = impressao_digital(arq_path, colunas_completas, com_hash)
+        entrada = buscar_no_cache(indice, arq_path, impressao, diretorio_cache, com_consolidado)
+        if entrada is None:
+            pendentes[indice_arquivo] = impressao
+        else:
+            resultados_por_arquivo[indice_arquivo] = (entrada['dados'], entrada['linhas'])
+
+    print(f"Cache: {len(lista_arquivos) - len(pendentes)} arquivo(s) reaproveitado(s), "
+          f"{len(pendentes)} para processar, {len(removidos)} entrada(s) removida(s)")
+
+    def registrar_resultado(indice_arquivo: int, resultado: tuple | None):
+        if resultado is None:
+            resultados_por_arquivo[indice_arquivo] = (None, [])
+        else:
+            df_compacto, linhas_do_arquivo, somas = resultado
+            resultados_por_arquivo[indice_arquivo] = (df_compacto, linhas_do_arquivo)
+            gravar_no_cache(indice, lista_arquivos[indice_arquivo], pendentes[indice_arquivo],
+                            df_compacto, linhas_do_arquivo, somas, diretorio_cache)
+        print(f"Processamento concluído para: {os.path.basename(lista_arquivos[indice_arquivo])}")
+
+    # Com um único arquivo para processar não vale a pena criar um pool de threads; os backends entre processos
+    # são mantidos, para que o resultado (e a verificação cruzada) continue passando pelo backend escolhido.
+    backend_pendentes = 'serial' if len(pendentes) <= 1 and backend == 'thread' else backend
+    for indice_arquivo, future in _executar_por_arquivo(backend_pendentes, max_workers, _processar_arquivo_para_cache,
+                                                        lista_arquivos, pendentes, colunas_completas, com_consolidado):
+        try:
+            registrar_resultado(indice_arquivo, future.result())
+        except Exception as exc:
+            print(f"Arquivo {os.path.basename(lista_arquivos[indice_arquivo])} gerou uma exceção: {exc}")
+
+    salvar_indice(indice, diretorio_cache)
+
+    tc_fim_leitura_calculo = time.time()
+
+    t_consolidacao_df = time.time()
+    resultados_validos = [resultado for resultado in resultados_por_arquivo if resultado is not None]
+    with medir('concatenacao', arquivos=len(resultados_validos)):
+        df_consolidado = consolidar_dataframes([df for df, _ in resultados_validos if df is not None]) \
+            if com_consolidado else None
+        resumo_metas = _montar_resumo([linha for _, linhas in resultados_validos for linha in linhas])
+    t_fim_consolidacao_df = time.time()
+
+    print(f"\nTempo lendo arquivos e calculando metas (incremental): {tc_fim_leitura_calculo - tc_leitura_calculo:.5f} segundos")
+    print(f"Tempo consolidando DataFrame e criando resumo: {t_fim_consolidacao_df - t_consolidacao_df:.5f} segundos")
+
+    return df_consolidado, resumo_metas
+
+def _somar_arquivo_detalhado(caminho_arquivo: str, colunas_extras: tuple = ()) -> pd.DataFrame | None:
+    """Somas de um arquivo por ramo, tribunal e colunas_extras (as colunas ausentes no arquivo viram um grupo vazio)."""
+    with arquivo_em_processamento(caminho_arquivo):
+        df_lido = ler_csv_tribunal(caminho_arquivo, colunas_extras=colunas_extras)
+        if df_lido.empty or 'ramo_justica' not in df_lido.columns:
+            return None
+        chaves = CHAVES_GRUPO + list(colunas_extras)
+        ausentes = {coluna: pd.Series(pd.NA, index=df_lido.index, dtype='category')
+                    for coluna in chaves if coluna not in df_lido.columns}
+        return somar_colunas_por_grupo(df_lido.assign(**ausentes) if ausentes else df_lido, chaves)
+
+def gerar_metas_detalhado(backend: str = 'thread', max_workers: int | None = None,
+                          colunas_extras: tuple = ()) -> pd.DataFrame:
+    """
+    Calcula as metas por (ramo_justica, sigla_tribunal) e, opcionalmente, por colunas_extras (ex.: comarca),
+    sem juntar os tribunais de um mesmo ramo. Cada arquivo devolve apenas as suas somas por grupo;
+    as somas de todos os arquivos são combinadas em uma única redução e as metas de todos os grupos
+    são avaliadas de uma vez (metas_por_grupo).
+    """
+    _validar_backend(backend)
+    lista_arquivos = _listar_arquivos_csv()
+    colunas_extras = tuple(colunas_extras)
+    somas_por_arquivo = [None] * len(lista_arquivos)
+
+    print(f"\n--- Iniciando processamento de dados (detalhado por tribunal{''.join(', ' + c for c in colunas_extras)}, "
+          f"backend '{backend}') ---")
+    tc_inicio = time.time()
+
+    for indice, future in _executar_por_arquivo(backend, max_workers, _somar_arquivo_detalhado, lista_arquivos,
+                                                range(len(lista_arquivos)), colunas_extras):
+        try:
+            somas_por_arquivo[indice] = future.result()
+            print(f"Processamento concluído para: {os.path.basename(lista_arquivos[indice])}")
+        except Exception as exc:
+            print(f"Erro ao ler o arquivo {os.path.basename(lista_arquivos[indice])}: {exc}")
+
+    somas = [somas_arquivo for somas_arquivo in somas_por_arquivo if somas_arquivo is not None]
+    if not somas:
+        return pd.DataFrame(columns=['sigla_tribunal', 'ramo_justica', *colunas_extras, *COLUNAS_METAS])
+    with medir('concatenacao', arquivos=len(somas)):
+        somas_combinadas = combinar_somas(somas)
+    resumo_detalhado = metas_por_grupo(somas_combinadas)
+
+    print(f"\nTempo calculando metas de {len(resumo_detalhado)} grupo(s) (detalhado): {time.time() - tc_inicio:.5f} segundos")
+    return resumo_detalhado
+
+MODOS = ('paralelo', 'incremental', 'streaming', 'agendado', 'pipeline')
+
+def executar(modo: str = 'paralelo', backend: str = 'thread', max_workers: int | None = None,
+             colunas_completas: bool = False, arquivo_consolidado: str = 'Consolidado.csv',
+             arquivo_resumo: str = 'ResumoMetas.csv', tamanho_chunk: int = TAMANHO_CHUNK_PADRAO,
+             com_hash: bool = False, orcamento_memoria_mb: float | None = None,
+             tamanho_max_tarefa_mb: float | None = None, diretorio_cache: str = DIRETORIO_CACHE) -> pd.DataFrame:
+    """
+    Ponto de entrada único do motor: processa os arquivos de DIRETORIO_DADOS no modo e backend informados,
+    grava arquivo_consolidado e arquivo_resumo e retorna o DataFrame de resumo de metas.
+    Com arquivo_consolidado=None somente o resumo é gravado (exceto nos modos streaming e pipeline,
+    que escrevem o Consolidado durante o processamento).
+    Modos: 'paralelo' (tudo em memória), 'incremental' (cache_metas), 'streaming' (blocos),
+    'agendado' (por tamanho, com orçamento de memória) e 'pipeline' (escrita sobreposta, asyncio).
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo inválido: {modo}. Use um de {MODOS}.")
+    _validar_backend(backend)
+    if arquivo_consolidado is None and modo in ('streaming', 'pipeline'):
+        raise ValueError(f"O modo {modo} grava o Consolidado durante o processamento; informe arquivo_consolidado.")
+    com_consolidado = arquivo_consolidado is not None
+
+    if modo == 'pipeline':
+        return gerar_metas_pipeline(arquivo_consolidado, arquivo_resumo, backend, max_workers, colunas_completas)
+
+    if modo == 'streaming':
+        resumo_metas = gerar_metas_streaming(arquivo_consolidado, tamanho_chunk, backend, max_workers, colunas_completas)
+    else:
+        if modo == 'incremental':
+            consolidado, resumo_metas = gerar_metas_incremental(backend, max_workers, colunas_completas, com_hash,
+                                                                diretorio_cache, com_consolidado)
+        elif modo == 'agendado':
+            consolidado, resumo_metas = gerar_metas_agendado(backend, max_workers, colunas_completas,
+                                                             orcamento_memoria_mb, tamanho_max_tarefa_mb, arquivo_consolidado,
+                                                             com_consolidado)
+        else:
+            consolidado, resumo_metas = gerar_metas_paralelizado(backend, max_workers, colunas_completas, arquivo_consolidado,
+                                                                 com_consolidado)
+        # Sem Consolidado, ou nos backends distribuídos (já escrito pelas partes), o consolidado é None.
+        if arquivo_consolidado is not None and consolidado is not None:
+            gerar_consolidado(consolidado, arquivo_consolidado)
+
+    gerar_resumo_metas(resumo_metas, arquivo_resumo)
+    return resumo_metas
+
+def diferencas_resumos(resumo_a: pd.DataFrame, resumo_b: pd.DataFrame,
+                       nomes: tuple[str, str] = ('a', 'b')) -> pd.DataFrame:
+    """
+    Compara dois resumos de metas célula a célula (pelo texto gravado no CSV) e retorna apenas as
+    células diferentes, com o tribunal e o ramo de cada linha. Resumos com formatos diferentes
+    geram uma única linha descrevendo a diferença.
+    """
+    if resumo_a.shape != resumo_b.shape or list(resumo_a.columns) != list(resumo_b.columns):
+        return pd.DataFrame([{'diferenca': f"formato {resumo_a.shape} contra {resumo_b.shape}"}])
+
+    diferencas = resumo_a.astype(str).compare(resumo_b.astype(str), result_names=nomes)
+    if diferencas.empty:
+        return diferencas
+    diferencas.columns = [f"{coluna} ({nome})" for coluna, nome in diferencas.columns]
+    return resumo_a.loc[diferencas.index, ['sigla_tribunal', 'ramo_justica']].join(diferencas)
+
+def comparar_backends(backend_a: str, backend_b: str, modo: str = 'paralelo', **opcoes) -> pd.DataFrame:
+    """
+    Verificação cruzada: executa o mesmo modo em dois backends (com saídas em um diretório temporário)
+    e retorna as diferenças entre os dois ResumoMetas (vazio quando são idênticos).
+    Cada execução usa um cache incremental próprio e vazio, para que no modo incremental os dois backends
+    processem todos os arquivos em vez de o segundo reaproveitar o que o primeiro gravou.
+    """
+    with tempfile.TemporaryDirectory() as diretorio_temporario:
+        resumos = []
+        for indice, backend in enumerate((backend_a, backend_b)):
+            arquivo_resumo = os.path.join(diretorio_temporario, f'ResumoMetas_{indice}.csv')
+            executar(modo, backend, arquivo_consolidado=os.path.join(diretorio_temporario, f'Consolidado_{indice}.csv'),
+                     arquivo_resumo=arquivo_resumo,
+                     diretorio_cache=os.path.join(diretorio_temporario, f'cache_{indice}'), **opcoes)
+            resumos.append(pd.read_csv(arquivo_resumo, dtype=str, keep_default_na=False))
+    return diferencas_resumos(*resumos, nomes=(backend_a, backend_b))
+
+def criar_parser(descricao: str, backend_padrao: str = 'thread', modo_padrao: str = 'paralelo') -> argparse.ArgumentParser:
+    """Parser de linha de comando do motor, compartilhado por Versao_P.py e Versao_NP.py."""
+    parser = argparse.ArgumentParser(description=descricao)
+    parser.add_argument('--modo', choices=MODOS, default=modo_padrao,
+                        help=f"Modo de processamento (padrão: {modo_padrao}).")
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default=backend_padrao,
+                        help=f"Executor usado para processar os arquivos (padrão: {backend_padrao}).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Número máximo de workers (padrão: os.cpu_count()).")
+    parser.add_argument('--trabalhadores', default=None,
+                        help="Backend distribuido: endereços dos trabalhadores (host:porta,host:porta).")
+    parser.add_argument('--chave', default=None,
+                        help="Backend distribuido: chave de autenticação dos trabalhadores.")
+    parser.add_argument('--comparar', default=None, metavar='BACKEND', choices=tuple(BACKENDS),
+                        help="Verificação cruzada: roda também este backend e mostra as diferenças entre os ResumoMetas.")
+    parser.add_argument('--colunas-completas', action='store_true',
+                        help="Lê todas as colunas dos CSVs para gerar um Consolidado completo.")
+    parser.add_argument('--streaming', dest='modo', action='store_const', const='streaming',
+                        help="O mesmo que --modo streaming: processa os CSVs em blocos, sem carregá-los inteiros em memória.")
+    parser.add_argument('--tamanho-chunk', type=int, default=TAMANHO_CHUNK_PADRAO,
+                        help=f"Linhas por bloco no modo streaming (padrão: {TAMANHO_CHUNK_PADRAO}).")
+    parser.add_argument('--pipeline', dest='modo', action='store_const', const='pipeline',
+                        help="O mesmo que --modo pipeline: cada arquivo concluído já é gravado nos CSVs de saída.")
+    parser.add_argument('--agendado', dest='modo', action='store_const', const='agendado',
+                        help="O mesmo que --modo agendado: arquivos do maior para o menor, com orçamento de memória.")
+    parser.add_argument('--orcamento-memoria', type=float, default=None,
+                        help="No modo agendado, limite (MB) de bytes de CSV em processamento ao mesmo tempo.")
+    parser.add_argument('--tamanho-max-tarefa', type=float, default=None,
+                        help="No modo agendado, tamanho (MB) acima do qual um arquivo é dividido em intervalos de linhas.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora o cache incremental e recalcula todos os arquivos (no modo incremental, usa o modo paralelo).")
+    parser.add_argument('--detalhado', action='store_true',
+                        help="Gera ResumoMetasDetalhado_<versão>.csv com as metas de cada tribunal (sem juntar os tribunais de um ramo).")
+    parser.add_argument('--colunas-grupo', default='',
+                        help="Com --detalhado, colunas adicionais de agrupamento separadas por vírgula (ex.: comarca).")
+    parser.add_argument('--hash', action='store_true',
+                        help="Inclui o SHA-256 do conteúdo na verificação do cache, além de tamanho e mtime.")
+    parser.add_argument('--sem-consolidado', action='store_true',
+                        help="Grava somente o ResumoMetas (modos paralelo, incremental e agendado).")
+    parser.add_argument('--sem-graficos', action='store_true',
+                        help="Não gera os gráficos (matplotlib e seaborn nem chegam a ser importados).")
+    parser.add_argument('--watch', action='store_true',
+                        help="Continua em execução observando a pasta Dados e recalcula (modo incremental) os arquivos que chegam ou mudam.")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_OBSERVACAO_PADRAO,
+                        help=f"Com --watch, segundos entre as verificações da pasta Dados (padrão: {INTERVALO_OBSERVACAO_PADRAO}).")
+    parser.add_argument('--diretorio-graficos', default=None,
+                        help="Salva os gráficos neste diretório (sem janela interativa) em vez de exibi-los.")
+    parser.add_argument('--formatos-graficos', default='png',
+                        help="Formatos dos gráficos salvos, separados por vírgula (ex.: png,svg).")
+    parser.add_argument('--instrumentacao', default=None,
+                        help="Grava a medição de cada etapa (por arquivo e worker) neste arquivo JSON lines.")
+    parser.add_argument('--instrumentacao-csv', default=None,
+                        help="Exporta também as medições para este arquivo CSV (requer --instrumentacao).")
+    return parser
+
+def main(argv: list[str] | None = None, sufixo: str = 'P', nome_versao: str = 'Versão Paralela',
+         backend_padrao: str = 'thread', modo_padrao: str = 'incremental'):
+    """Executa o motor pela linha de comando, gravando Consolidado_<sufixo>.csv e ResumoMetas_<sufixo>.csv."""
+    parser = criar_parser(f"Calcula as metas dos tribunais ({nome_versao}).", backend_padrao, modo_padrao)
+    args = parser.parse_args(argv)
+    if args.no_cache and args.watch:
+        parser.error("--no-cache não se aplica a --watch, que recalcula pelo cache incremental somente os arquivos alterados")
+    if args.no_cache and args.modo == 'incremental':
+        args.modo = 'paralelo'
+    if args.sem_consolidado and args.modo in ('streaming', 'pipeline'):
+        parser.error(f"--sem-consolidado não se aplica ao modo {args.modo}, que grava o Consolidado durante o processamento")
+    opcoes = dict(max_workers=args.workers, colunas_completas=args.colunas_completas, tamanho_chunk=args.tamanho_chunk,
+                  com_hash=args.hash, orcamento_memoria_mb=args.orcamento_memoria,
+                  tamanho_max_tarefa_mb=args.tamanho_max_tarefa)
+
+    if args.trabalhadores or args.chave:
+        import distribuido
+        distribuido.configurar(args.trabalhadores or os.environ.get(distribuido.VARIAVEL_TRABALHADORES, ''),
+                               args.chave or os.environ.get(distribuido.VARIAVEL_CHAVE, ''))
+
+    if args.comparar:
+        diferencas = comparar_backends(args.backend, args.comparar, args.modo, **opcoes)
+        if diferencas.empty:
+            print(f"\nResumoMetas idênticos nos backends '{args.backend}' e '{args.comparar}' (modo {args.modo}).")
+            return
+        print(f"\nResumoMetas diferentes nos backends '{args.backend}' e '{args.comparar}' (modo {args.modo}):")
+        print(diferencas.to_string())
+        sys.exit(1)
+
+    instrumentacao.configurar(args.instrumentacao)
+
+    t_inicio_total = time.time()
+
+    if args.detalhado:
+        colunas_extras = tuple(coluna for coluna in args.colunas_grupo.split(',') if coluna)
+        resumo_detalhado = gerar_metas_detalhado(args.backend, args.workers, colunas_extras)
+        gerar_resumo_metas(resumo_detalhado, f'ResumoMetasDetalhado_{sufixo}.csv')
+        print(f"Tempo total de execução ({nome_versao}): {(time.time() - t_inicio_total):.5f} segundos")
+        return
+
+    if args.watch and args.modo != 'incremental':
+        print(f"--watch usa o modo incremental (em vez de {args.modo}) para recalcular somente os arquivos alterados.")
+        args.modo = 'incremental'
+    arquivos_saida = dict(arquivo_consolidado=None if args.sem_consolidado else f'Consolidado_{sufixo}.csv',
+                          arquivo_resumo=f'ResumoMetas_{sufixo}.csv')
+    # No --watch os gráficos interativos bloqueariam a observação: só são gerados quando vão para arquivo.
+    com_graficos = not args.sem_graficos and (args.diretorio_graficos is not None or not args.watch)
+    formatos_graficos = tuple(args.formatos_graficos.split(','))
+    # Estado da pasta antes da primeira execução: um CSV trocado durante ela é recalculado na primeira verificação.
+    estado_dados = estado_dos_dados() if args.watch else None
+
+    resumo_metas_df = executar(args.modo, args.backend, **arquivos_saida, **opcoes)
+
+    if com_graficos:
+        gerar_grafico(resumo_metas_df, diretorio_saida=args.diretorio_graficos, formatos=formatos_graficos)
+
+    t_fim_total = time.time()
+    print(f"Tempo total de execução ({nome_versao}): {(t_fim_total - t_inicio_total):.5f} segundos")
+
+    if args.instrumentacao:
+        print("\nResumo da instrumentação por etapa:")
+        print(instrumentacao.resumo_por_etapa().to_string())
+        if args.instrumentacao_csv:
+            instrumentacao.exportar_csv(args.instrumentacao_csv)
+
+    if args.watch:
+        print(f"\nObservando {DIRETORIO_DADOS} a cada {args.intervalo} segundo(s) (Ctrl+C para encerrar).")
+        try:
+            for alterados, removidos in observar_dados(args.intervalo, estado_dados):
+                print(f"\n{len(alterados)} arquivo(s) novo(s) ou alterado(s), {len(removidos)} removido(s): "
+                      f"{', '.join(os.path.basename(caminho) for caminho in alterados + removidos)}")
+                t_inicio = time.time()
+                resumo_metas_df = executar(args.modo, args.backend, **arquivos_saida, **opcoes)
+                if com_graficos:
+                    gerar_grafico(resumo_metas_df, diretorio_saida=args.diretorio_graficos, formatos=formatos_graficos)
+                print(f"Tempo de recálculo ({nome_versao}): {(time.time() - t_inicio):.5f} segundos")
+        except KeyboardInterrupt:
+            print("\nObservação encerrada.")
+
+if __name__ == "__main__":
+    # Importa o próprio módulo para que as funções enviadas aos workers sejam referenciadas como pipeline.*
+    # (e não __main__.*), o que os trabalhadores do backend distribuido precisam para encontrá-las.
+    import pipeline
+    pipeline.main(sufixo='P', nome_versao='Motor de metas')
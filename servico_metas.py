@@ -0,0 +1,241 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+import argparse
+import functools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import pipeline
+
+from meta_calculadora import COLUNAS_METAS
+
+from cache_metas import invalidar_entrada
+
+PORTA_PADRAO = 8765
+TAMANHO_CACHE_AGREGADOS = 1024
+
+# Funções de agregação aceitas em /agregado (aplicadas somente aos valores numéricos; 'NA' é ignorado).
+FUNCOES_AGREGACAO = {
+    'media': np.mean,
+    'mediana': np.median,
+    'minimo': np.min,
+    'maximo': np.max,
+    'soma': np.sum,
+    'contagem': len
+}
+
+def normalizar_meta(meta: str) -> str:
+    """Aceita '2A' ou 'Meta 2A'."""
+    meta = meta.strip()
+    return meta if meta.startswith('Meta ') else f'Meta {meta}'
+
+class _Carga:
+    """Um ResumoMetas carregado: valores por (tribunal, ramo, meta) e as chaves de cada tribunal, ramo e meta."""
+    __slots__ = ('versao', 'mtime_ns', 'linhas', 'valores', 'por_tribunal', 'por_ramo', 'por_meta')
+
+    def __init__(self, resumo: pd.DataFrame, versao: int, mtime_ns: int | None):
+        self.versao = versao
+        self.mtime_ns = mtime_ns
+        self.linhas = len(resumo)
+        self.valores = {}
+        self.por_tribunal = {}
+        self.por_ramo = {}
+        self.por_meta = {}
+
+        colunas_metas = [coluna for coluna in COLUNAS_METAS if coluna in resumo.columns]
+        numeros = resumo[colunas_metas].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+        siglas = resumo['sigla_tribunal'].astype(str).tolist()
+        ramos = resumo['ramo_justica'].astype(str).tolist()
+        for linha, (sigla, ramo) in enumerate(zip(siglas, ramos)):
+            for coluna, meta in enumerate(colunas_metas):
+                valor = numeros[linha, coluna]
+                chave = (sigla, ramo, meta)
+                if chave not in self.valores:
+                    self.valores[chave] = []
+                    self.por_tribunal.setdefault(sigla, []).append(chave)
+                    self.por_ramo.setdefault(ramo, []).append(chave)
+                    self.por_meta.setdefault(meta, []).append(chave)
+                # Uma linha do resumo por arquivo: o mesmo tribunal pode ter mais de um valor.
+                self.valores[chave].append(None if np.isnan(valor) else float(valor))
+
+    def chaves(self, tribunal: str | None = None, ramo: str | None = None, meta: str | None = None) -> list[tuple]:
+        """Chaves que atendem aos filtros, partindo do menor índice entre os filtros informados."""
+        candidatos = [indice.get(valor, []) for indice, valor in
+                      ((self.por_tribunal, tribunal), (self.por_ramo, ramo), (self.por_meta, meta)) if valor is not None]
+        if not candidatos:
+            return list(self.valores)
+        menor = min(candidatos, key=len)
+        return [chave for chave in menor
+                if (tribunal is None or chave[0] == tribunal) and (ramo is None or chave[1] == ramo)
+                and (meta is None or chave[2] == meta)]
+
+class IndiceMetas:
+    """
+    ResumoMetas em memória, indexado por tribunal, ramo e meta. A cada consulta o mtime do CSV é conferido
+    (um os.stat) e o índice é recarregado quando o motor grava um resumo novo; as agregações ficam em um
+    cache LRU por versão do índice.
+    """
+    def __init__(self, caminho_resumo: str, tamanho_cache: int = TAMANHO_CACHE_AGREGADOS):
+        self.caminho_resumo = caminho_resumo
+        self._trava = threading.Lock()
+        self._carga = _Carga(pd.DataFrame(columns=['sigla_tribunal', 'ramo_justica']), 0, None)
+        self._agregar_em_cache = functools.lru_cache(maxsize=tamanho_cache)(self._agregar)
+        self.atualizar()
+
+    def atualizar(self) -> _Carga:
+        """Recarrega o resumo se o arquivo mudou desde a última carga e retorna a carga atual."""
+        try:
+            mtime_ns = os.stat(self.caminho_resumo).st_mtime_ns
+        except OSError:
+            return self._carga
+        if mtime_ns == self._carga.mtime_ns:
+            return self._carga
+        with self._trava:
+            if mtime_ns != self._carga.mtime_ns:
+                t0 = time.time()
+                try:
+                    resumo = pd.read_csv(self.caminho_resumo, dtype=str, keep_default_na=False)
+                except Exception as e:
+                    print(f"Erro ao recarregar {self.caminho_resumo}: {e}")
+                    return self._carga
+                self._carga = _Carga(resumo, self._carga.versao + 1, mtime_ns)
+                self._agregar_em_cache.cache_clear()
+                print(f"Resumo carregado (versão {self._carga.versao}, {self._carga.linhas} linha(s)) "
+                      f"em {time.time() - t0:.5f} segundos")
+        return self._carga
+
+    def consultar(self, tribunal: str | None = None, ramo: str | None = None, meta: str | None = None) -> list[dict]:
+        carga = self.atualizar()
+        return [dict(zip(('sigla_tribunal', 'ramo_justica', 'meta'), chave), valores=carga.valores[chave])
+                for chave in carga.chaves(tribunal, ramo, meta)]
+
+    def agregar(self, funcao: str, tribunal: str | None = None, ramo: str | None = None,
+                meta: str | None = None) -> dict:
+        if funcao not in FUNCOES_AGREGACAO:
+            raise ValueError(f"Função inválida: {funcao}. Use uma de {sorted(FUNCOES_AGREGACAO)}.")
+        return self._agregar_em_cache(self.atualizar(), funcao, tribunal, ramo, meta)
+
+    def _agregar(self, carga: _Carga, funcao: str, tribunal: str | None, ramo: str | None, meta: str | None) -> dict:
+        valores = [valor for chave in carga.chaves(tribunal, ramo, meta) for valor in carga.valores[chave]
+                   if valor is not None]
+        resultado = float(FUNCOES_AGREGACAO[funcao](valores)) if valores else None
+        return {'funcao': funcao, 'sigla_tribunal': tribunal, 'ramo_justica': ramo, 'meta': meta,
+                'valor': resultado, 'valores_considerados': len(valores), 'versao': carga.versao}
+
+    def estado(self) -> dict:
+        carga = self.atualizar()
+        informacoes_cache = self._agregar_em_cache.cache_info()
+        return {'arquivo': self.caminho_resumo, 'versao': carga.versao, 'linhas': carga.linhas,
+                'tribunais': len(carga.por_tribunal), 'cache_agregados': informacoes_cache._asdict()}
+
+class ServicoMetas(ThreadingHTTPServer):
+    """Servidor HTTP das consultas; recalcular() executa o modo incremental do motor, uma execução por vez."""
+    daemon_threads = True
+
+    def __init__(self, endereco: tuple[str, int], indice: IndiceMetas, arquivo_consolidado: str,
+                 backend: str = 'serial', colunas_completas: bool = False):
+        super().__init__(endereco, _TratadorMetas)
+        self.indice = indice
+        self.arquivo_consolidado = arquivo_consolidado
+        self.backend = backend
+        self.colunas_completas = colunas_completas
+        self._trava_recalculo = threading.Lock()
+
+    def recalcular(self, nome_arquivo: str) -> dict:
+        """
+        Invalida a entrada de um CSV de DIRETORIO_DADOS no cache_metas e executa o modo incremental:
+        esse arquivo (e os que mudaram desde a última execução) é lido; os demais vêm do cache.
+        O resumo gravado é recarregado pelo índice.
+        """
+        arquivos = {os.path.basename(caminho): caminho for caminho in pipeline._listar_arquivos_csv()}
+        if nome_arquivo not in arquivos:
+            raise FileNotFoundError(f"Arquivo não encontrado em {pipeline.DIRETORIO_DADOS}: {nome_arquivo}")
+        with self._trava_recalculo:
+            t0 = time.time()
+            invalidar_entrada(arquivos[nome_arquivo])
+            pipeline.executar('incremental', self.backend, colunas_completas=self.colunas_completas,
+                              arquivo_consolidado=self.arquivo_consolidado, arquivo_resumo=self.indice.caminho_resumo)
+            carga = self.indice.atualizar()
+            return {'arquivo': nome_arquivo, 'segundos': time.time() - t0, 'versao': carga.versao}
+
+class _TratadorMetas(BaseHTTPRequestHandler):
+    """
+    GET  /metas?tribunal=TJSP&ramo=...&meta=1      valores de cada (tribunal, ramo, meta) que atende aos filtros
+    GET  /agregado?funcao=media&ramo=...&meta=1    agregação dos valores filtrados (cache LRU)
+    GET  /estado                                   versão do índice e estatísticas do cache
+    POST /recalcular?arquivo=estadual_1.csv        recalcula um arquivo pelo modo incremental
+    """
+    def _responder(self, status: int, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _parametros(self) -> tuple[str, dict]:
+        url = urlsplit(self.path)
+        parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+        if 'meta' in parametros:
+            parametros['meta'] = normalizar_meta(parametros['meta'])
+        return url.path.rstrip('/'), parametros
+
+    def do_GET(self):
+        caminho, parametros = self._parametros()
+        filtros = {nome: parametros.get(nome) for nome in ('tribunal', 'ramo', 'meta')}
+        try:
+            if caminho == '/metas':
+                self._responder(200, self.server.indice.consultar(**filtros))
+            elif caminho == '/agregado':
+                self._responder(200, self.server.indice.agregar(parametros.get('funcao', 'media'), **filtros))
+            elif caminho == '/estado':
+                self._responder(200, self.server.indice.estado())
+            else:
+                self._responder(404, {'erro': f"Rota desconhecida: {caminho}"})
+        except ValueError as e:
+            self._responder(400, {'erro': str(e)})
+
+    def do_POST(self):
+        caminho, parametros = self._parametros()
+        if caminho != '/recalcular':
+            self._responder(404, {'erro': f"Rota desconhecida: {caminho}"})
+            return
+        if 'arquivo' not in parametros:
+            self._responder(400, {'erro': "Informe o parâmetro arquivo."})
+            return
+        try:
+            self._responder(200, self.server.recalcular(parametros['arquivo']))
+        except FileNotFoundError as e:
+            self._responder(404, {'erro': str(e)})
+        except Exception as e:
+            self._responder(500, {'erro': str(e)})
+
+    def log_message(self, formato, *args):
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço local de consulta às metas calculadas (HTTP).")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface de escuta (padrão: 127.0.0.1).")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--sufixo', default='P', help="Versão cujos arquivos são servidos: ResumoMetas_<sufixo>.csv (padrão: P).")
+    parser.add_argument('--backend', default='serial', choices=sorted(pipeline.BACKENDS),
+                        help="Backend usado por /recalcular (padrão: serial).")
+    parser.add_argument('--colunas-completas', action='store_true', help="Recalcula o Consolidado com todas as colunas.")
+    parser.add_argument('--tamanho-cache', type=int, default=TAMANHO_CACHE_AGREGADOS,
+                        help="Quantidade de agregações mantidas no cache LRU.")
+    args = parser.parse_args()
+
+    indice = IndiceMetas(f'ResumoMetas_{args.sufixo}.csv', args.tamanho_cache)
+    servidor = ServicoMetas((args.host, args.porta), indice, f'Consolidado_{args.sufixo}.csv',
+                            args.backend, args.colunas_completas)
+    print(f"Servindo {indice.caminho_resumo} em http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
@@ -1,34 +1,288 @@
 import pandas as pd
 import os
+import io
 import time
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+import shutil
+import tempfile
+import unicodedata
+import concurrent.futures
 
-from meta_calculadora import META_IDS
+import cache_colunar
+
+from instrumentacao import medir
+
+from meta_calculadora import COLUNAS_SCHEMA, COLUNAS_CATEGORICAS, COLUNAS_NUMERICAS, DTYPES_SCHEMA
+
+def ler_csv_tribunal(caminho_arquivo: str, colunas_completas: bool = False, colunas_extras: tuple = (),
+                     **kwargs) -> pd.DataFrame:
+    """
+    Lê um CSV de tribunal. Por padrão lê apenas as colunas do schema das metas
+    (ramo_justica, sigla_tribunal e as colunas numéricas usadas nos cálculos),
+    já com dtypes nativos: 'category' para os textos e 'float64' para as contagens
+    (parsing rápido, sem arredondar contagens grandes nem valores decimais).
+    Com colunas_completas=True o arquivo é lido inteiro, como antes, para um Consolidado.csv completo.
+    Se existir uma versão colunar (cache_colunar) do CSV atual ela é carregada via memory-map;
+    caso contrário o CSV é lido e convertido para uso nas próximas execuções.
+    colunas_extras (ex.: ('comarca',)) são lidas junto com o schema, como 'category'; nesse caso o cache colunar não é usado.
+    """
+    with medir('leitura', caminho_arquivo) as registro:
+        usar_colunar = cache_colunar.HABILITADO and not kwargs and not colunas_extras
+        if usar_colunar:
+            df = cache_colunar.carregar_colunar(caminho_arquivo, colunas_completas)
+            if df is not None:
+                registro.update(origem='colunar', linhas=len(df))
+                return df
+
+        with medir('parsing', caminho_arquivo, bytes=os.path.getsize(caminho_arquivo)) as registro_parsing:
+            df = _ler_csv_tribunal(caminho_arquivo, colunas_completas, colunas_extras, **kwargs)
+            registro_parsing['linhas'] = len(df)
+        if usar_colunar:
+            cache_colunar.salvar_colunar(df, caminho_arquivo, colunas_completas)
+        registro.update(origem='csv', linhas=len(df))
+        return df
+
+def _ler_csv_tribunal(caminho_arquivo: str, colunas_completas: bool = False, colunas_extras: tuple = (),
+                      **kwargs) -> pd.DataFrame:
+    """Leitura do CSV propriamente dita, usada por ler_csv_tribunal."""
+    if colunas_completas:
+        return pd.read_csv(caminho_arquivo, **kwargs)
+
+    colunas_schema = set(COLUNAS_SCHEMA) | set(colunas_extras)
+    categoricas = {coluna: 'category' for coluna in [*COLUNAS_CATEGORICAS, *colunas_extras]}
+    try:
+        return pd.read_csv(caminho_arquivo, usecols=lambda coluna: coluna in colunas_schema,
+                           dtype={**DTYPES_SCHEMA, **categoricas}, **kwargs)
+    except ValueError:
+        # Alguma coluna numérica possui valores não numéricos:
+        # lê sem dtype fixo para as contagens e converte coluna a coluna.
+        if hasattr(caminho_arquivo, 'seek'):
+            caminho_arquivo.seek(0)
+        df = pd.read_csv(caminho_arquivo, usecols=lambda coluna: coluna in colunas_schema,
+                         dtype=categoricas, **kwargs)
+        return _converter_colunas_numericas(df)
+
+def ler_intervalo_csv_tribunal(caminho_arquivo: str, inicio: int, fim: int,
+                               colunas_completas: bool = False) -> pd.DataFrame:
+    """
+    Lê apenas os bytes [inicio, fim) de um CSV de tribunal (um intervalo de linhas completas),
+    com o cabeçalho do arquivo à frente e o mesmo schema de ler_csv_tribunal.
+    """
+    with medir('leitura', caminho_arquivo, origem='intervalo') as registro:
+        with open(caminho_arquivo, 'rb') as arquivo:
+            cabecalho = arquivo.readline()
+            arquivo.seek(inicio)
+            conteudo = arquivo.read(fim - inicio)
+        with medir('parsing', caminho_arquivo, bytes=fim - inicio) as registro_parsing:
+            df = _ler_csv_tribunal(io.BytesIO(cabecalho + conteudo), colunas_completas)
+            registro_parsing['linhas'] = len(df)
+        registro['linhas'] = len(df)
+        return df
+
+def ler_csv_tribunal_em_chunks(caminho_arquivo: str, tamanho_chunk: int, colunas_completas: bool = False):
+    """
+    Lê um CSV de tribunal em blocos de tamanho_chunk linhas, com o mesmo schema de ler_csv_tribunal.
+    Se algum bloco tiver valores não numéricos nas contagens, a leitura continua do ponto em que parou
+    convertendo os blocos seguintes coluna a coluna.
+    Se já existir a versão colunar do CSV, os blocos são fatias dela (memory-map, sem parsing).
+    """
+    if cache_colunar.HABILITADO:
+        df = cache_colunar.carregar_colunar(caminho_arquivo, colunas_completas)
+        if df is not None:
+            for inicio in range(0, len(df), tamanho_chunk):
+                yield df.iloc[inicio:inicio + tamanho_chunk]
+            return
+
+    if colunas_completas:
+        with pd.read_csv(caminho_arquivo, chunksize=tamanho_chunk) as leitor:
+            yield from leitor
+        return
+
+    colunas_schema = set(COLUNAS_SCHEMA)
+    linhas_lidas = 0
+    try:
+        with pd.read_csv(caminho_arquivo, usecols=lambda coluna: coluna in colunas_schema,
+                         dtype=DTYPES_SCHEMA, chunksize=tamanho_chunk) as leitor:
+            for chunk in leitor:
+                linhas_lidas += len(chunk)
+                yield chunk
+        return
+    except ValueError:
+        pass
+
+    with pd.read_csv(caminho_arquivo, usecols=lambda coluna: coluna in colunas_schema,
+                     dtype={coluna: 'category' for coluna in COLUNAS_CATEGORICAS},
+                     skiprows=range(1, linhas_lidas + 1), chunksize=tamanho_chunk) as leitor:
+        for chunk in leitor:
+            yield _converter_colunas_numericas(chunk)
+
+def colunas_do_consolidado(lista_arquivos: list[str], colunas_completas: bool = False) -> list[str]:
+    """
+    Lê apenas o cabeçalho de cada arquivo e retorna as colunas do consolidado
+    na ordem em que aparecem, a mesma que o pd.concat dos arquivos produziria.
+    """
+    colunas = {}
+    for caminho_arquivo in lista_arquivos:
+        try:
+            cabecalho = pd.read_csv(caminho_arquivo, nrows=0).columns
+        except Exception:
+            continue
+        for coluna in cabecalho:
+            if colunas_completas or coluna in COLUNAS_SCHEMA:
+                colunas.setdefault(coluna)
+    return list(colunas)
+
+def _dtype_sem_extensao(dtype, tipos: str) -> bool:
+    """dtype comum (não de extensão do pandas, como category ou Int64) de um dos tipos ('f', 'iu', ...)."""
+    return not isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in tipos
+
+def dtypes_unificados(blocos: list[tuple[int, pd.DataFrame]]) -> dict:
+    """
+    Retorna o dtype de cada coluna do consolidado escrito em blocos, o mesmo que o pd.concat dos dados de todos
+    os blocos produziria (ex.: uma coluna inteira em um arquivo e com vazios em outro vira float64 em todos).
+    Cada bloco é (tamanho em bytes, df.iloc[:0]) do que foi escrito: os dtypes vêm de quem leu os dados, sem reler nada.
+    """
+    vazios = [vazio for _, vazio in blocos]
+    return pd.concat(vazios).dtypes.to_dict() if vazios else {}
+
+def _colunas_para_float(vazio: pd.DataFrame, dtypes: dict) -> list[str]:
+    """Colunas que o bloco escreveu como inteiras (0) e que são float no consolidado (0.0)."""
+    return [coluna for coluna, dtype in vazio.dtypes.items()
+            if _dtype_sem_extensao(dtype, 'iu') and coluna in dtypes and _dtype_sem_extensao(dtypes[coluna], 'f')]
+
+def _copiar_bloco(entrada, saida, tamanho: int, colunas_consolidado: list[str], colunas_para_float: list[str]):
+    if not colunas_para_float:
+        while tamanho > 0:
+            dados = entrada.read(min(tamanho, 1024 * 1024))
+            if not dados:
+                break
+            saida.write(dados)
+            tamanho -= len(dados)
+        return
+    df = pd.read_csv(io.BytesIO(entrada.read(tamanho)), header=None, names=colunas_consolidado,
+                     dtype=str, keep_default_na=False, na_filter=False)
+    for coluna in colunas_para_float:
+        df[coluna] = pd.to_numeric(df[coluna]).astype('float64')
+    df.to_csv(saida, header=False, index=False)
+
+def copiar_blocos_csv(entrada, saida, blocos: list[tuple[int, pd.DataFrame]], colunas_consolidado: list[str],
+                      dtypes: dict):
+    """
+    Copia os blocos lidos em sequência de entrada para saida (arquivos binários). Um bloco que escreveu como
+    inteira uma coluna que é float em dtypes (dtypes_unificados) é relido como texto e essa coluna reescrita
+    como float, para que o consolidado saia como o do pd.concat; os demais são copiados byte a byte.
+    """
+    for tamanho, vazio in blocos:
+        if tamanho:
+            _copiar_bloco(entrada, saida, tamanho, colunas_consolidado, _colunas_para_float(vazio, dtypes))
+
+def reformatar_blocos_csv(arquivo: str, blocos: list[tuple[int, pd.DataFrame]], colunas_consolidado: list[str],
+                          dtypes: dict):
+    """
+    Os blocos ocupam o final de arquivo, na ordem: reescreve-os a partir do primeiro cuja formatação muda com
+    dtypes (ver copiar_blocos_csv). Quando nenhum muda, o caso comum, o arquivo não é tocado.
+    """
+    primeiro = next((indice for indice, (_, vazio) in enumerate(blocos) if _colunas_para_float(vazio, dtypes)), None)
+    if primeiro is None:
+        return
+    inicio = os.path.getsize(arquivo) - sum(tamanho for tamanho, _ in blocos[primeiro:])
+    with medir('escrita', arquivo), open(arquivo, 'r+b') as saida, tempfile.TemporaryFile() as restante:
+        saida.seek(inicio)
+        shutil.copyfileobj(saida, restante)
+        restante.seek(0)
+        saida.seek(inicio)
+        saida.truncate()
+        copiar_blocos_csv(restante, saida, blocos[primeiro:], colunas_consolidado, dtypes)
+
+def _converter_colunas_numericas(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte as colunas numéricas do schema para float64 (valores não numéricos viram NaN)."""
+    for coluna in COLUNAS_NUMERICAS:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    return df
 
 def gerar_consolidado(df_consolidado: pd.DataFrame, filename: str = 'Consolidado.csv'):
     """Salva o DataFrame consolidado em um arquivo CSV."""
     t0 = time.time()
     try:
-        df_consolidado.to_csv(filename, index=False)
+        with medir('escrita', filename, linhas=len(df_consolidado)):
+            df_consolidado.to_csv(filename, index=False)
         tf = time.time()
         print(f"Tempo criando {filename}: {tf - t0:.5f} segundos")
     except Exception as e:
         print(f"Erro ao salvar {filename}: {e}")
 
 def gerar_resumo_metas(df_resumo_metas: pd.DataFrame, filename: str = 'ResumoMetas.csv'):
-    """Salva o DataFrame de resumo de metas em um arquivo CSV."""
+    """
+    Salva o DataFrame de resumo de metas em um arquivo CSV. O arquivo é escrito em um temporário e
+    substituído de uma vez, para que quem está lendo (ex.: servico_metas.py) nunca veja um resumo pela metade.
+    """
     t0 = time.time()
     try:
-        df_resumo_metas.to_csv(filename, index=False)
+        with medir('escrita', filename, linhas=len(df_resumo_metas)):
+            df_resumo_metas.to_csv(filename + '.tmp', index=False)
+            os.replace(filename + '.tmp', filename)
         tf = time.time()
         print(f"Tempo criando {filename}: {tf - t0:.5f} segundos")
     except Exception as e:
         print(f"Erro ao salvar {filename}: {e}")
 
-def gerar_grafico(df_resumo_metas: pd.DataFrame) -> float:
-    """Gera heatmaps de desempenho das metas para diferentes grupos de justiça."""
+def _desenhar_heatmap(ax, df_para_heatmap_grupo: pd.DataFrame, nome_grupo: str):
+    """Desenha o heatmap de um grupo de justiça no eixo informado."""
+    # matplotlib e seaborn só são importados quando um gráfico é pedido (a importação leva alguns segundos).
+    import seaborn as sns
+    from matplotlib.artist import setp
+
+    sns.heatmap(df_para_heatmap_grupo,
+                ax=ax,
+                annot=True,
+                fmt=".1f",
+                cmap="viridis",
+                linewidths=.5,
+                linecolor='black',
+                cbar_kws={'label': 'Valor da Meta'},
+                annot_kws={"size": 10})
+
+    ax.set_title(f'Desempenho das Metas por Tribunal ({nome_grupo})', fontsize=16)
+    ax.set_ylabel('Sigla do Tribunal', fontsize=12)
+    ax.set_xlabel('Metas', fontsize=12)
+    setp(ax.get_xticklabels(), rotation=45, ha='right', fontsize=10)
+    setp(ax.get_yticklabels(), rotation=0, fontsize=10)
+
+def _tamanho_figura(df_para_heatmap_grupo: pd.DataFrame) -> tuple[float, float]:
+    return (15, max(8, len(df_para_heatmap_grupo) * 0.8))
+
+def _nome_arquivo_grafico(nome_grupo: str) -> str:
+    """Converte o nome do grupo em um nome de arquivo sem acentos ou espaços."""
+    sem_acentos = unicodedata.normalize('NFKD', nome_grupo).encode('ascii', 'ignore').decode('ascii')
+    return 'heatmap_' + '_'.join(sem_acentos.lower().split())
+
+def _renderizar_heatmap_em_arquivo(df_para_heatmap_grupo: pd.DataFrame, nome_grupo: str,
+                                   caminhos_saida: list[str]) -> list[str]:
+    """
+    Renderiza o heatmap de um grupo direto para arquivo, sem janela interativa.
+    Usa uma Figure com canvas Agg em vez do pyplot, então pode rodar em qualquer processo do pool.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    with medir('grafico', grupo=nome_grupo, linhas=len(df_para_heatmap_grupo)):
+        figura = Figure(figsize=_tamanho_figura(df_para_heatmap_grupo))
+        FigureCanvasAgg(figura)
+        _desenhar_heatmap(figura.subplots(), df_para_heatmap_grupo, nome_grupo)
+        figura.tight_layout()
+        for caminho_saida in caminhos_saida:
+            figura.savefig(caminho_saida)
+    return caminhos_saida
+
+def gerar_grafico(df_resumo_metas: pd.DataFrame, diretorio_saida: str | None = None,
+                  formatos: tuple[str, ...] = ('png',), grupos_extras: dict[str, list[str]] | None = None,
+                  max_workers: int | None = None) -> float:
+    """
+    Gera heatmaps de desempenho das metas para diferentes grupos de justiça.
+    Sem diretorio_saida os gráficos são exibidos com plt.show(), como antes. Com diretorio_saida
+    cada grupo é renderizado em paralelo (processos, backend Agg) para um arquivo por formato
+    (ex.: 'png', 'svg'), sem janela interativa. grupos_extras adiciona agrupamentos {nome: [ramos]}.
+    """
     if df_resumo_metas.empty:
         print("DataFrame de resumo de metas vazio. Nenhum gráfico será gerado.")
         return 0.0
@@ -44,49 +298,51 @@ def gerar_grafico(df_resumo_metas: pd.DataFrame) -> float:
     todos_ramos_no_df = df_resumo_metas['ramo_justica'].unique()
     ramos_com_grafico_proprio = [ramo for sublist in grupos_justica.values() for ramo in sublist]
     grupos_justica['Demais Ramos'] = [ramo for ramo in todos_ramos_no_df if ramo not in ramos_com_grafico_proprio]
+    grupos_justica.update(grupos_extras or {})
 
-    tempo_total_graficos = 0
-    pd.set_option('future.no_silent_downcasting', True)
+    # Matriz numérica ('NA' -> NaN) calculada uma única vez e reaproveitada por todos os grupos.
+    matriz_metas = df_resumo_metas[colunas_metas].apply(pd.to_numeric, errors='coerce').astype(float)
+    matriz_metas.index = df_resumo_metas['sigla_tribunal']
 
+    heatmaps_por_grupo = {}
     for nome_grupo, ramos_a_filtrar in grupos_justica.items():
         if not ramos_a_filtrar:
             continue
+        linhas_grupo = df_resumo_metas['ramo_justica'].isin(ramos_a_filtrar).to_numpy()
+        df_para_heatmap_grupo = matriz_metas[linhas_grupo].dropna(axis=1, how='all')
+        if not df_para_heatmap_grupo.empty:
+            heatmaps_por_grupo[nome_grupo] = df_para_heatmap_grupo
 
-        tg = time.time()
-        df_grupo = df_resumo_metas[df_resumo_metas['ramo_justica'].isin(ramos_a_filtrar)].copy()
+    if diretorio_saida is None:
+        import matplotlib.pyplot as plt
 
-        df_para_heatmap_grupo = df_grupo.set_index('sigla_tribunal')[colunas_metas].copy()
-        
-        df_para_heatmap_grupo = df_para_heatmap_grupo.replace('NA', np.nan)
-        df_para_heatmap_grupo = df_para_heatmap_grupo.astype(float)
-        
-        df_para_heatmap_grupo = df_para_heatmap_grupo.dropna(axis=1, how='all')
+        tempo_total_graficos = 0
+        for nome_grupo, df_para_heatmap_grupo in heatmaps_por_grupo.items():
+            tg = time.time()
+            with medir('grafico', grupo=nome_grupo, linhas=len(df_para_heatmap_grupo)):
+                plt.figure(figsize=_tamanho_figura(df_para_heatmap_grupo))
+                _desenhar_heatmap(plt.gca(), df_para_heatmap_grupo, nome_grupo)
+                plt.tight_layout()
+                plt.show()
+            tempo_total_graficos += (time.time() - tg)
+        return tempo_total_graficos
 
-        if df_para_heatmap_grupo.empty:
-            continue
+    tg = time.time()
+    os.makedirs(diretorio_saida, exist_ok=True)
+    tarefas = [
+        (df_para_heatmap_grupo, nome_grupo,
+         [os.path.join(diretorio_saida, f"{_nome_arquivo_grafico(nome_grupo)}.{formato}") for formato in formatos])
+        for nome_grupo, df_para_heatmap_grupo in heatmaps_por_grupo.items()
+    ]
+    max_workers = min(max_workers or os.cpu_count(), len(tarefas)) if tarefas else 1
+
+    if max_workers <= 1:
+        arquivos_gerados = [arquivo for tarefa in tarefas for arquivo in _renderizar_heatmap_em_arquivo(*tarefa)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_renderizar_heatmap_em_arquivo, *tarefa) for tarefa in tarefas]
+            arquivos_gerados = [arquivo for future in futures for arquivo in future.result()]
 
-        plt.figure(figsize=(15, max(8, len(df_para_heatmap_grupo) * 0.8)))
-        
-        sns.heatmap(df_para_heatmap_grupo,
-                    annot=True,
-                    fmt=".1f",
-                    cmap="viridis",
-                    linewidths=.5,
-                    linecolor='black',
-                    cbar_kws={'label': 'Valor da Meta'},
-                    annot_kws={"size": 10})
-
-        plt.title(f'Desempenho das Metas por Tribunal ({nome_grupo})', fontsize=16)
-        plt.ylabel('Sigla do Tribunal', fontsize=12)
-        plt.xlabel('Metas', fontsize=12)
-        plt.xticks(rotation=45, ha='right', fontsize=10)
-        plt.yticks(rotation=0, fontsize=10)
-        plt.tight_layout()
-        plt.show()
-
-        tf_grafico = time.time()
-        tempo_total_graficos += (tf_grafico - tg)
-
-    pd.set_option('future.no_silent_downcasting', False)
-
-    return tempo_total_graficos
\ No newline at end of file
+    tempo_total_graficos = time.time() - tg
+    print(f"Gráficos salvos em {diretorio_saida}: {len(arquivos_gerados)} arquivo(s) em {tempo_total_graficos:.5f} segundos")
+    return tempo_total_graficos